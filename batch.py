@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from generators import GENERATORS
+from maze import Maze
+from mazefile import save_grid
+
+
+def generate_maze(num_rows, num_cols, seed, generator="backtracker"):
+    maze = Maze(0, 0, num_rows, num_cols, 1, 1, seed=seed, generator=generator)
+    return maze.grid
+
+
+def _generate_task(task):
+    num_rows, num_cols, seed, out_dir, generator = task
+    grid = generate_maze(num_rows, num_cols, seed, generator)
+    path = os.path.join(out_dir, f"maze_{seed}.maze")
+    save_grid(path, grid, seed, generator)
+    return {
+        "seed": seed,
+        "rows": num_rows,
+        "cols": num_cols,
+        "generator": generator,
+        "path": path,
+    }
+
+
+def generate_batch(
+    num_rows,
+    num_cols,
+    count,
+    out_dir,
+    seed_start=0,
+    workers=None,
+    chunksize=None,
+    generator="backtracker",
+):
+    os.makedirs(out_dir, exist_ok=True)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, count // (workers * 4))
+    tasks = [
+        (num_rows, num_cols, seed, out_dir, generator)
+        for seed in range(seed_start, seed_start + count)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_generate_task, tasks, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate mazes in bulk.")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="mazes")
+    parser.add_argument(
+        "--generator", choices=sorted(GENERATORS), default="backtracker"
+    )
+    args = parser.parse_args(argv)
+
+    manifest_path = os.path.join(args.out, "manifest.jsonl")
+    os.makedirs(args.out, exist_ok=True)
+    with open(manifest_path, "a") as manifest:
+        for result in generate_batch(
+            args.rows,
+            args.cols,
+            args.count,
+            args.out,
+            seed_start=args.seed_start,
+            workers=args.workers,
+            generator=args.generator,
+        ):
+            manifest.write(json.dumps(result) + "\n")
+            manifest.flush()
+            print(f"Generated {result['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import shelve
+import struct
+from array import array
+from collections import OrderedDict
+
+from grid import CLEAR_VISITED
+from result import SolveResult
+
+ENTRY_OVERHEAD = 128
+
+
+def maze_fingerprint(grid, seed=None):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(struct.pack("<II", grid.num_cols, grid.num_rows))
+    digest.update(repr(seed).encode())
+    digest.update(bytes(grid.cells).translate(CLEAR_VISITED))
+    if grid.weights is not None:
+        digest.update(b"weights")
+        digest.update(bytes(grid.weights))
+    return digest.hexdigest()
+
+
+def _pack(result):
+    coords = None
+    if result.path is not None:
+        coords = array("i")
+        for i, j in result.path:
+            coords.append(i)
+            coords.append(j)
+    return result.algorithm, coords, result.expanded
+
+
+def _unpack(entry):
+    algorithm, coords, expanded = entry
+    path = None
+    if coords is not None:
+        path = list(zip(coords[0::2], coords[1::2]))
+    return SolveResult(algorithm, path, expanded, cached=True)
+
+
+def _entry_size(entry):
+    coords = entry[1]
+    if coords is None:
+        return ENTRY_OVERHEAD
+    return ENTRY_OVERHEAD + len(coords) * coords.itemsize
+
+
+class SolveCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__store = shelve.open(path) if path is not None else None
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def size_bytes(self):
+        return self.__bytes
+
+    def get(self, key):
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+        elif self.__store is not None and repr(key) in self.__store:
+            entry = self.__store[repr(key)]
+            self.__insert(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _unpack(entry)
+
+    def put(self, key, result):
+        entry = _pack(result)
+        if key in self.__entries:
+            self.__bytes -= _entry_size(self.__entries.pop(key))
+        self.__insert(key, entry)
+        if self.__store is not None:
+            self.__store[repr(key)] = entry
+
+    def __insert(self, key, entry):
+        self.__entries[key] = entry
+        self.__bytes += _entry_size(entry)
+        while self.__entries and (
+            len(self.__entries) > self.max_entries or self.__bytes > self.max_bytes
+        ):
+            _, evicted = self.__entries.popitem(last=False)
+            self.__bytes -= _entry_size(evicted)
+
+    def clear(self):
+        self.__entries.clear()
+        self.__bytes = 0
+        if self.__store is not None:
+            self.__store.clear()
+
+    def close(self):
+        if self.__store is not None:
+            self.__store.close()
+            self.__store = None
@@ -5,28 +5,57 @@ from graphics import (
     UNDO_PATH_COLOR,
     DARK_BACKGROUND,
 )
+from grid import WallGrid, LEFT, RIGHT, TOP, BOTTOM, VISITED
 
 
 class Cell:
-    def __init__(self, win=None):
-        self.has_left_wall = True
-        self.has_right_wall = True
-        self.has_top_wall = True
-        self.has_bottom_wall = True
-        self.visited = False
+    def __init__(self, win=None, grid=None, i=0, j=0):
+        if grid is None:
+            grid = WallGrid(1, 1)
+            i = j = 0
+        self.__grid = grid
+        self.__index = grid.index(i, j)
         self.__x1 = -1
         self.__x2 = -1
         self.__y1 = -1
         self.__y2 = -1
         self.__win = win
 
-    def draw(self, x1, y1, x2, y2):
-        if self.__win is None:
-            return
+    def __get(self, bit):
+        return bool(self.__grid.cells[self.__index] & bit)
+
+    def __set(self, bit, value):
+        if value:
+            self.__grid.cells[self.__index] |= bit
+        else:
+            self.__grid.cells[self.__index] &= ~bit
+
+    has_left_wall = property(
+        lambda self: self.__get(LEFT), lambda self, v: self.__set(LEFT, v)
+    )
+    has_right_wall = property(
+        lambda self: self.__get(RIGHT), lambda self, v: self.__set(RIGHT, v)
+    )
+    has_top_wall = property(
+        lambda self: self.__get(TOP), lambda self, v: self.__set(TOP, v)
+    )
+    has_bottom_wall = property(
+        lambda self: self.__get(BOTTOM), lambda self, v: self.__set(BOTTOM, v)
+    )
+    visited = property(
+        lambda self: self.__get(VISITED), lambda self, v: self.__set(VISITED, v)
+    )
+
+    def place(self, x1, y1, x2, y2):
         self.__x1 = x1
         self.__x2 = x2
         self.__y1 = y1
         self.__y2 = y2
+
+    def draw(self, x1, y1, x2, y2):
+        if self.__win is None:
+            return
+        self.place(x1, y1, x2, y2)
         if self.has_left_wall:
             line = Line(Point(x1, y1), Point(x1, y2))
             self.__win.draw_line(line)
@@ -69,3 +98,36 @@ class Cell:
         if self.__win is None:
             return
         self.__win.draw_line(line, fill_color)
+
+
+class CellColumn:
+    def __init__(self, grid, i, win=None):
+        self.__grid = grid
+        self.__i = i
+        self.__win = win
+
+    def __len__(self):
+        return self.__grid.num_rows
+
+    def __getitem__(self, j):
+        if j < 0:
+            j += self.__grid.num_rows
+        if not 0 <= j < self.__grid.num_rows:
+            raise IndexError(j)
+        return Cell(self.__win, self.__grid, self.__i, j)
+
+
+class CellGrid:
+    def __init__(self, grid, win=None):
+        self.__grid = grid
+        self.__win = win
+
+    def __len__(self):
+        return self.__grid.num_cols
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.__grid.num_cols
+        if not 0 <= i < self.__grid.num_cols:
+            raise IndexError(i)
+        return CellColumn(self.__grid, i, self.__win)
@@ -0,0 +1,45 @@
+from array import array
+
+
+def _distances_scipy(graph, source):
+    import numpy as np
+    from scipy.sparse import csgraph
+
+    dist = csgraph.dijkstra(
+        graph.to_scipy(), directed=True, unweighted=True, indices=source
+    )
+    dist[np.isinf(dist)] = -1
+    flat = array("i")
+    flat.frombytes(dist.astype(np.intc).tobytes())
+    return flat
+
+
+def _distances_python(graph, source):
+    offsets = graph.offsets
+    neighbors = graph.neighbors
+    dist = array("i", [-1]) * len(graph)
+    dist[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for idx in frontier:
+            for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                if dist[n_idx] < 0:
+                    dist[n_idx] = depth
+                    next_frontier.append(n_idx)
+        frontier = next_frontier
+    return dist
+
+
+def distance_field(graph, source):
+    # Both paths return the same shape: a list of array("i") columns, where
+    # dist[i][j] is the number of steps from source to cell (i, j), or -1 when
+    # the cell cannot be reached.
+    try:
+        flat = _distances_scipy(graph, source)
+    except ImportError:
+        flat = _distances_python(graph, source)
+    rows = graph.num_rows
+    return [flat[i * rows : (i + 1) * rows] for i in range(graph.num_cols)]
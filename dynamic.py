@@ -0,0 +1,125 @@
+import heapq
+from array import array
+
+from grid import LEFT, RIGHT, TOP, BOTTOM
+
+INF = 2**31 - 1
+
+
+class LpaStar:
+    def __init__(self, grid, start, end):
+        size = len(grid)
+        self.__grid = grid
+        self.start = start
+        self.end = end
+        self.__g = array("i", [INF]) * size
+        self.__rhs = array("i", [INF]) * size
+        self.__rhs[start] = 0
+        self.__open = {}
+        self.__heap = []
+        weights = grid.weights
+        self.__min_weight = min(weights) if weights is not None and size else 1
+        self.touched = 0
+        self.__count = 0
+        self.__push(start)
+
+    def __cost(self, idx):
+        weights = self.__grid.weights
+        return 1 if weights is None else weights[idx]
+
+    def __neighbors(self, idx):
+        grid = self.__grid
+        rows = grid.num_rows
+        i, j = divmod(idx, rows)
+        walls = grid.cells[idx]
+        result = []
+        if i < grid.num_cols - 1 and not walls & RIGHT:
+            result.append(idx + rows)
+        if j < rows - 1 and not walls & BOTTOM:
+            result.append(idx + 1)
+        if i > 0 and not walls & LEFT:
+            result.append(idx - rows)
+        if j > 0 and not walls & TOP:
+            result.append(idx - 1)
+        return result
+
+    def __key(self, idx):
+        rows = self.__grid.num_rows
+        i, j = divmod(idx, rows)
+        end_i, end_j = divmod(self.end, rows)
+        h = (abs(end_i - i) + abs(end_j - j)) * self.__min_weight
+        best = min(self.__g[idx], self.__rhs[idx])
+        if best == INF:
+            return (INF, INF)
+        return (best + h, best)
+
+    def __push(self, idx):
+        key = self.__key(idx)
+        self.__open[idx] = key
+        heapq.heappush(self.__heap, (key, idx))
+
+    def __top_key(self):
+        heap = self.__heap
+        while heap and self.__open.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else (INF, INF)
+
+    def __update_vertex(self, idx):
+        self.__count += 1
+        g = self.__g
+        rhs = self.__rhs
+        if idx != self.start:
+            cost = self.__cost(idx)
+            best = INF
+            for n_idx in self.__neighbors(idx):
+                if g[n_idx] != INF and g[n_idx] + cost < best:
+                    best = g[n_idx] + cost
+            rhs[idx] = best
+        self.__open.pop(idx, None)
+        if g[idx] != rhs[idx]:
+            self.__push(idx)
+
+    def update_edge(self, a, b):
+        self.__update_vertex(a)
+        self.__update_vertex(b)
+
+    def compute(self):
+        g = self.__g
+        rhs = self.__rhs
+        end = self.end
+        while self.__top_key() < self.__key(end) or rhs[end] != g[end]:
+            if not self.__heap:
+                break
+            _, idx = heapq.heappop(self.__heap)
+            del self.__open[idx]
+            self.__count += 1
+            if g[idx] > rhs[idx]:
+                g[idx] = rhs[idx]
+                for n_idx in self.__neighbors(idx):
+                    self.__update_vertex(n_idx)
+            else:
+                g[idx] = INF
+                self.__update_vertex(idx)
+                for n_idx in self.__neighbors(idx):
+                    self.__update_vertex(n_idx)
+        self.touched = self.__count
+        self.__count = 0
+        return self.path()
+
+    def distance(self, idx):
+        g = self.__g[idx]
+        return -1 if g == INF else g
+
+    def path(self):
+        g = self.__g
+        if g[self.end] == INF:
+            return None
+        path = [self.end]
+        idx = self.end
+        while idx != self.start:
+            idx = min(self.__neighbors(idx), key=lambda n_idx: g[n_idx])
+            if g[idx] == INF:
+                return None
+            path.append(idx)
+        path.reverse()
+        return path
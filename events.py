@@ -0,0 +1,35 @@
+from array import array
+
+CARVE = 0
+VISIT = 1
+BACKTRACK = 2
+PATH = 3
+
+RECORD_SIZE = 5
+
+
+class EventLog:
+    def __init__(self):
+        self.records = array("i")
+
+    def __len__(self):
+        return len(self.records) // RECORD_SIZE
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        start = k * RECORD_SIZE
+        return tuple(self.records[start : start + RECORD_SIZE])
+
+    def __iter__(self):
+        records = self.records
+        for start in range(0, len(records), RECORD_SIZE):
+            yield tuple(records[start : start + RECORD_SIZE])
+
+    def record(self, op, i, j, ni, nj):
+        self.records.extend((op, i, j, ni, nj))
+
+    def clear(self):
+        del self.records[:]
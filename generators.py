@@ -0,0 +1,230 @@
+from array import array
+
+from events import CARVE
+from grid import ALL_WALLS, LEFT, RIGHT, TOP, BOTTOM, VISITED
+
+
+def _record(events, i, j, ni, nj):
+    if events is not None:
+        events.record(CARVE, i, j, ni, nj)
+
+
+def _carve(grid, events, idx, n_idx):
+    rows = grid.num_rows
+    i, j = divmod(idx, rows)
+    ni, nj = divmod(n_idx, rows)
+    grid.carve(i, j, ni, nj)
+    _record(events, i, j, ni, nj)
+
+
+def _neighbors(idx, cols, rows):
+    i, j = divmod(idx, rows)
+    result = []
+    if i > 0:
+        result.append(idx - rows)
+    if i < cols - 1:
+        result.append(idx + rows)
+    if j > 0:
+        result.append(idx - 1)
+    if j < rows - 1:
+        result.append(idx + 1)
+    return result
+
+
+def recursive_backtracker(grid, rng, events=None, start=(0, 0)):
+    cells = grid.cells
+    rows = grid.num_rows
+    cols = grid.num_cols
+    start_i, start_j = start
+    stack = []
+    cells[start_i * rows + start_j] |= VISITED
+    stack.append((start_i, start_j))
+
+    while stack:
+        curr_i, curr_j = stack[-1]
+        idx = curr_i * rows + curr_j
+
+        next_index_list = []
+        if curr_i > 0 and not cells[idx - rows] & VISITED:
+            next_index_list.append((curr_i - 1, curr_j))
+        if curr_i < cols - 1 and not cells[idx + rows] & VISITED:
+            next_index_list.append((curr_i + 1, curr_j))
+        if curr_j > 0 and not cells[idx - 1] & VISITED:
+            next_index_list.append((curr_i, curr_j - 1))
+        if curr_j < rows - 1 and not cells[idx + 1] & VISITED:
+            next_index_list.append((curr_i, curr_j + 1))
+
+        if not next_index_list:
+            stack.pop()
+            continue
+
+        next_i, next_j = rng.choice(next_index_list)
+        grid.carve(curr_i, curr_j, next_i, next_j)
+        _record(events, curr_i, curr_j, next_i, next_j)
+
+        cells[next_i * rows + next_j] |= VISITED
+        stack.append((next_i, next_j))
+
+
+def _find(parent, idx):
+    while parent[idx] != idx:
+        parent[idx] = parent[parent[idx]]
+        idx = parent[idx]
+    return idx
+
+
+def kruskal(grid, rng, events=None):
+    cols = grid.num_cols
+    rows = grid.num_rows
+    parent = array("i", range(cols * rows))
+    size = array("i", [1]) * (cols * rows)
+    edges = []
+    for idx in range(cols * rows):
+        i, j = divmod(idx, rows)
+        if i < cols - 1:
+            edges.append(idx * 2)
+        if j < rows - 1:
+            edges.append(idx * 2 + 1)
+    rng.shuffle(edges)
+
+    remaining = cols * rows - 1
+    for edge in edges:
+        if not remaining:
+            break
+        idx = edge >> 1
+        n_idx = idx + 1 if edge & 1 else idx + rows
+        root = _find(parent, idx)
+        n_root = _find(parent, n_idx)
+        if root == n_root:
+            continue
+        if size[root] < size[n_root]:
+            root, n_root = n_root, root
+        parent[n_root] = root
+        size[root] += size[n_root]
+        _carve(grid, events, idx, n_idx)
+        remaining -= 1
+
+
+def prim(grid, rng, events=None):
+    cols = grid.num_cols
+    rows = grid.num_rows
+    state = bytearray(cols * rows)
+    in_maze = 2
+    in_frontier = 1
+    first = rng.randrange(cols * rows)
+    state[first] = in_maze
+    frontier = []
+    for n_idx in _neighbors(first, cols, rows):
+        state[n_idx] = in_frontier
+        frontier.append(n_idx)
+
+    while frontier:
+        k = rng.randrange(len(frontier))
+        frontier[k], frontier[-1] = frontier[-1], frontier[k]
+        idx = frontier.pop()
+        neighbors = _neighbors(idx, cols, rows)
+        connected = [n_idx for n_idx in neighbors if state[n_idx] == in_maze]
+        _carve(grid, events, rng.choice(connected), idx)
+        state[idx] = in_maze
+        for n_idx in neighbors:
+            if not state[n_idx]:
+                state[n_idx] = in_frontier
+                frontier.append(n_idx)
+
+
+def wilson(grid, rng, events=None):
+    cols = grid.num_cols
+    rows = grid.num_rows
+    in_tree = bytearray(cols * rows)
+    next_step = array("i", [-1]) * (cols * rows)
+    in_tree[rng.randrange(cols * rows)] = 1
+
+    for walk_start in range(cols * rows):
+        if in_tree[walk_start]:
+            continue
+        idx = walk_start
+        while not in_tree[idx]:
+            n_idx = rng.choice(_neighbors(idx, cols, rows))
+            next_step[idx] = n_idx
+            idx = n_idx
+        idx = walk_start
+        while not in_tree[idx]:
+            in_tree[idx] = 1
+            _carve(grid, events, idx, next_step[idx])
+            idx = next_step[idx]
+
+
+def eller_rows(num_cols, rng, num_rows=None, events=None):
+    row_sets = array("i", [-1]) * num_cols
+    j = 0
+    while num_rows is None or j < num_rows:
+        row = bytearray([ALL_WALLS]) * num_cols
+        used = bytearray(num_cols)
+        for i in range(num_cols):
+            if row_sets[i] >= 0:
+                row[i] &= ~TOP
+                used[row_sets[i]] = 1
+        free = [set_id for set_id in range(num_cols - 1, -1, -1) if not used[set_id]]
+        members = {}
+        for i in range(num_cols):
+            if row_sets[i] < 0:
+                row_sets[i] = free.pop()
+            members.setdefault(row_sets[i], []).append(i)
+
+        last_row = j == num_rows - 1 if num_rows is not None else False
+        for i in range(num_cols - 1):
+            a = row_sets[i]
+            b = row_sets[i + 1]
+            if a == b or not (last_row or rng.random() < 0.5):
+                continue
+            row[i] &= ~RIGHT
+            row[i + 1] &= ~LEFT
+            _record(events, i, j, i + 1, j)
+            if len(members[a]) < len(members[b]):
+                a, b = b, a
+            for k in members[b]:
+                row_sets[k] = a
+            members[a].extend(members.pop(b))
+
+        below = array("i", [-1]) * num_cols
+        if not last_row:
+            for set_id, columns in members.items():
+                rng.shuffle(columns)
+                count = 1 + rng.randrange(len(columns))
+                for i in columns[:count]:
+                    row[i] &= ~BOTTOM
+                    _record(events, i, j, i, j + 1)
+                    below[i] = set_id
+        row_sets = below
+        yield row
+        j += 1
+
+
+def open_ends(rows):
+    previous = None
+    for row in rows:
+        if previous is None:
+            row[0] &= ~TOP
+        else:
+            yield previous
+        previous = row
+    if previous is not None:
+        previous[-1] &= ~BOTTOM
+        yield previous
+
+
+def eller(grid, rng, events=None):
+    cells = grid.cells
+    rows = grid.num_rows
+    for j, row in enumerate(eller_rows(grid.num_cols, rng, rows, events)):
+        for i, walls in enumerate(row):
+            cells[i * rows + j] &= walls
+
+
+GENERATORS = {
+    "backtracker": recursive_backtracker,
+    "kruskal": kruskal,
+    "prim": prim,
+    "wilson": wilson,
+    "eller": eller,
+}
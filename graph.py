@@ -0,0 +1,94 @@
+from array import array
+
+from grid import LEFT, RIGHT, TOP, BOTTOM
+
+
+class MazeGraph:
+    def __init__(self, num_cols, num_rows, offsets, neighbors):
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.offsets = offsets
+        self.neighbors = neighbors
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def neighbors_of(self, idx):
+        return self.neighbors[self.offsets[idx] : self.offsets[idx + 1]]
+
+    def degree(self, idx):
+        return self.offsets[idx + 1] - self.offsets[idx]
+
+    def num_edges(self):
+        return len(self.neighbors) // 2
+
+    def to_scipy(self, weights=None):
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        indptr = np.frombuffer(self.offsets, dtype=np.int32)
+        indices = np.frombuffer(self.neighbors, dtype=np.int32)
+        if weights is None:
+            data = np.ones(len(indices), dtype=np.int8)
+        else:
+            data = np.frombuffer(bytes(weights), dtype=np.uint8)[indices]
+        return csr_matrix((data, indices, indptr), shape=(len(self), len(self)))
+
+
+def prune_dead_ends(graph, keep=()):
+    size = len(graph)
+    offsets = graph.offsets
+    neighbors = graph.neighbors
+    degree = array("i", [0]) * size
+    removed = bytearray(size)
+    for idx in keep:
+        removed[idx] = 2
+    queue = []
+    for idx in range(size):
+        degree[idx] = offsets[idx + 1] - offsets[idx]
+        if degree[idx] <= 1 and not removed[idx]:
+            queue.append(idx)
+
+    while queue:
+        idx = queue.pop()
+        removed[idx] = 1
+        for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+            if removed[n_idx]:
+                continue
+            degree[n_idx] -= 1
+            if degree[n_idx] == 1:
+                queue.append(n_idx)
+
+    pruned_offsets = array("i", [0]) * (size + 1)
+    pruned_neighbors = array("i")
+    for idx in range(size):
+        if removed[idx] != 1:
+            for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                if removed[n_idx] != 1:
+                    pruned_neighbors.append(n_idx)
+        pruned_offsets[idx + 1] = len(pruned_neighbors)
+    return MazeGraph(graph.num_cols, graph.num_rows, pruned_offsets, pruned_neighbors)
+
+
+def build_graph(grid):
+    cols = grid.num_cols
+    rows = grid.num_rows
+    cells = grid.cells
+    offsets = array("i", [0]) * (cols * rows + 1)
+    neighbors = array("i")
+    append = neighbors.append
+    idx = 0
+    for i in range(cols):
+        for j in range(rows):
+            walls = cells[idx]
+            if i < cols - 1 and not walls & RIGHT:
+                append(idx + rows)
+            if j < rows - 1 and not walls & BOTTOM:
+                append(idx + 1)
+            if i > 0 and not walls & LEFT:
+                append(idx - rows)
+            if j > 0 and not walls & TOP:
+                append(idx - 1)
+            idx += 1
+            offsets[idx] = len(neighbors)
+    return MazeGraph(cols, rows, offsets, neighbors)
@@ -80,22 +80,36 @@ class Window:
         )
         self.solve_time_label.pack(side="bottom", pady=(0, 5))
 
-        self.__running = False
-
     def redraw(self):
         self.__root.update_idletasks()
         self.__root.update()
 
     def wait_for_close(self):
-        self.__running = True
-        while self.__running:
-            self.redraw()
+        self.__root.mainloop()
+
+    def schedule(self, delay_ms, callback):
+        return self.__root.after(delay_ms, callback)
 
-    def draw_line(self, line, fill_color=LIGHT_FOREGROUND):
-        line.draw(self.__canvas, fill_color)
+    def cancel(self, job):
+        self.__root.after_cancel(job)
+
+    def draw_line(self, line, fill_color=LIGHT_FOREGROUND, tag=None):
+        line.draw(self.__canvas, fill_color, tag)
+
+    def draw_polyline(self, points, fill_color=LIGHT_FOREGROUND, tag=None):
+        coords = []
+        for point in points:
+            coords.append(point.x)
+            coords.append(point.y)
+        self.__canvas.create_line(
+            *coords, fill=fill_color, width=2, joinstyle="round", tags=tag
+        )
+
+    def delete_tag(self, tag):
+        self.__canvas.delete(tag)
 
     def close(self):
-        self.__running = False
+        self.__root.quit()
 
     def add_button(self, text, command):
         button = Button(
@@ -110,6 +124,10 @@ class Window:
             font=("Arial", 10, "bold"),
         )
         button.pack(side="left", padx=5)
+        return button
+
+    def set_button_enabled(self, button, enabled):
+        button.config(state="normal" if enabled else "disabled")
 
     def clear_canvas(self):
         self.__canvas.delete("all")
@@ -152,7 +170,13 @@ class Line:
         self.p1 = p1
         self.p2 = p2
 
-    def draw(self, canvas, fill_color="black"):
+    def draw(self, canvas, fill_color="black", tag=None):
         canvas.create_line(
-            self.p1.x, self.p1.y, self.p2.x, self.p2.y, fill=fill_color, width=2
+            self.p1.x,
+            self.p1.y,
+            self.p2.x,
+            self.p2.y,
+            fill=fill_color,
+            width=2,
+            tags=tag,
         )
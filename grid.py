@@ -0,0 +1,65 @@
+LEFT = 1
+RIGHT = 2
+TOP = 4
+BOTTOM = 8
+VISITED = 16
+ALL_WALLS = LEFT | RIGHT | TOP | BOTTOM
+
+OPPOSITE = {LEFT: RIGHT, RIGHT: LEFT, TOP: BOTTOM, BOTTOM: TOP}
+
+CLEAR_VISITED = bytes(b & ~VISITED for b in range(256))
+
+
+class WallGrid:
+    def __init__(self, num_cols, num_rows, cells=None, weights=None):
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        if cells is None:
+            cells = bytearray([ALL_WALLS]) * (num_cols * num_rows)
+        self.cells = cells
+        self.weights = weights
+
+    def __len__(self):
+        return self.num_cols * self.num_rows
+
+    def index(self, i, j):
+        return i * self.num_rows + j
+
+    def coords(self, idx):
+        return divmod(idx, self.num_rows)
+
+    def has_wall(self, i, j, side):
+        return bool(self.cells[i * self.num_rows + j] & side)
+
+    def set_wall(self, i, j, side, present):
+        idx = i * self.num_rows + j
+        if present:
+            self.cells[idx] |= side
+        else:
+            self.cells[idx] &= ~side
+
+    def weight(self, i, j):
+        if self.weights is None:
+            return 1
+        return self.weights[i * self.num_rows + j]
+
+    def is_visited(self, i, j):
+        return bool(self.cells[i * self.num_rows + j] & VISITED)
+
+    def set_visited(self, i, j, visited):
+        self.set_wall(i, j, VISITED, visited)
+
+    def carve(self, i, j, ni, nj):
+        if ni == i + 1:
+            side = RIGHT
+        elif ni == i - 1:
+            side = LEFT
+        elif nj == j + 1:
+            side = BOTTOM
+        else:
+            side = TOP
+        self.cells[i * self.num_rows + j] &= ~side
+        self.cells[ni * self.num_rows + nj] &= ~OPPOSITE[side]
+
+    def reset_visited(self):
+        self.cells[:] = bytes(self.cells).translate(CLEAR_VISITED)
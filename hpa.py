@@ -0,0 +1,237 @@
+import heapq
+from collections import deque
+
+from grid import LEFT, RIGHT, TOP, BOTTOM
+
+CLUSTER_SIZE = 16
+
+
+class HpaIndex:
+    def __init__(self, grid, cluster_size=CLUSTER_SIZE):
+        self.__grid = grid
+        self.cluster_size = cluster_size
+        self.clusters_across = -(-grid.num_cols // cluster_size)
+        self.clusters_down = -(-grid.num_rows // cluster_size)
+        num_clusters = self.clusters_across * self.clusters_down
+        self.__edges = {}
+        self.__members = [set() for _ in range(num_clusters)]
+        weights = grid.weights
+        self.__min_weight = min(weights) if weights is not None and len(grid) else 1
+        self.last_stats = {"abstract": 0, "inserted": 0, "refined": 0}
+        self.rebuild(range(num_clusters))
+
+    @property
+    def num_nodes(self):
+        return len(self.__edges)
+
+    def num_edges(self):
+        return sum(len(edges) for edges in self.__edges.values())
+
+    def cluster(self, idx):
+        i, j = divmod(idx, self.__grid.num_rows)
+        size = self.cluster_size
+        return i // size * self.clusters_down + j // size
+
+    def __cost(self, idx):
+        weights = self.__grid.weights
+        return 1 if weights is None else weights[idx]
+
+    def __crossings(self, cluster):
+        grid = self.__grid
+        rows = grid.num_rows
+        cells = grid.cells
+        i0, j0, i1, j1 = self.__bounds(cluster)
+        for j in range(j0, j1):
+            if i0 > 0 and not cells[i0 * rows + j] & LEFT:
+                yield i0 * rows + j, (i0 - 1) * rows + j
+            if i1 < grid.num_cols and not cells[(i1 - 1) * rows + j] & RIGHT:
+                yield (i1 - 1) * rows + j, i1 * rows + j
+        for i in range(i0, i1):
+            if j0 > 0 and not cells[i * rows + j0] & TOP:
+                yield i * rows + j0, i * rows + j0 - 1
+            if j1 < rows and not cells[i * rows + j1 - 1] & BOTTOM:
+                yield i * rows + j1 - 1, i * rows + j1
+
+    def __bounds(self, cluster):
+        size = self.cluster_size
+        ci, cj = divmod(cluster, self.clusters_down)
+        i0, j0 = ci * size, cj * size
+        grid = self.__grid
+        return i0, j0, min(i0 + size, grid.num_cols), min(j0 + size, grid.num_rows)
+
+    def __search(self, source, cluster, target=None, reverse=False):
+        # Dijkstra (BFS when unweighted) confined to one cluster. A reverse
+        # search measures the cost of reaching the source, so it charges the
+        # cell being left rather than the cell being entered.
+        grid = self.__grid
+        rows = grid.num_rows
+        cells = grid.cells
+        weights = grid.weights
+        i0, j0, i1, j1 = self.__bounds(cluster)
+        dist = {source: 0}
+        parent = {source: source}
+        queue = deque([source])
+        heap = [(0, source)]
+        expanded = 0
+        while queue if weights is None else heap:
+            if weights is None:
+                idx = queue.popleft()
+                d = dist[idx]
+            else:
+                d, idx = heapq.heappop(heap)
+                if d > dist[idx]:
+                    continue
+            expanded += 1
+            if idx == target:
+                break
+            i, j = divmod(idx, rows)
+            walls = cells[idx]
+            neighbors = []
+            if i + 1 < i1 and not walls & RIGHT:
+                neighbors.append(idx + rows)
+            if j + 1 < j1 and not walls & BOTTOM:
+                neighbors.append(idx + 1)
+            if i > i0 and not walls & LEFT:
+                neighbors.append(idx - rows)
+            if j > j0 and not walls & TOP:
+                neighbors.append(idx - 1)
+            for n_idx in neighbors:
+                if weights is None:
+                    if n_idx not in dist:
+                        dist[n_idx] = d + 1
+                        parent[n_idx] = idx
+                        queue.append(n_idx)
+                    continue
+                n_dist = d + (weights[idx] if reverse else weights[n_idx])
+                if n_idx not in dist or n_dist < dist[n_idx]:
+                    dist[n_idx] = n_dist
+                    parent[n_idx] = idx
+                    heapq.heappush(heap, (n_dist, n_idx))
+        return dist, parent, expanded
+
+    def __add_node(self, idx):
+        if idx not in self.__edges:
+            self.__edges[idx] = {}
+            self.__members[self.cluster(idx)].add(idx)
+
+    def rebuild(self, clusters):
+        clusters = set(clusters)
+        edges = self.__edges
+        for cluster in clusters:
+            for node in self.__members[cluster]:
+                for other in edges.pop(node):
+                    if other in edges:
+                        edges[other].pop(node, None)
+            self.__members[cluster] = set()
+        for cluster in clusters:
+            for a, b in self.__crossings(cluster):
+                self.__add_node(a)
+                self.__add_node(b)
+                edges[a][b] = self.__cost(b)
+                edges[b][a] = self.__cost(a)
+        for cluster in clusters:
+            members = self.__members[cluster]
+            for node in members:
+                dist, _, _ = self.__search(node, cluster)
+                node_edges = edges[node]
+                for other in members:
+                    if other != node and other in dist:
+                        node_edges[other] = dist[other]
+
+    def update_edge(self, a, b):
+        self.rebuild({self.cluster(a), self.cluster(b)})
+
+    def search(self, start, end):
+        stats = self.last_stats = {"abstract": 0, "inserted": 0, "refined": 0}
+        if start == end:
+            return [start]
+        start_cluster = self.cluster(start)
+        end_cluster = self.cluster(end)
+        start_dist, start_parent, expanded = self.__search(start, start_cluster)
+        stats["inserted"] += expanded
+        end_dist, end_parent, expanded = self.__search(end, end_cluster, reverse=True)
+        stats["inserted"] += expanded
+
+        start_edges = {
+            node: start_dist[node]
+            for node in self.__members[start_cluster]
+            if node in start_dist
+        }
+        if end in start_dist:
+            start_edges[end] = start_dist[end]
+        to_end = {
+            node: end_dist[node]
+            for node in self.__members[end_cluster]
+            if node in end_dist
+        }
+
+        rows = self.__grid.num_rows
+        end_i, end_j = divmod(end, rows)
+        min_weight = self.__min_weight
+
+        def heuristic(idx):
+            i, j = divmod(idx, rows)
+            return (abs(end_i - i) + abs(end_j - j)) * min_weight
+
+        g_score = {start: 0}
+        came_from = {start: start}
+        closed = set()
+        open_set = [(heuristic(start), start)]
+        while open_set:
+            _, node = heapq.heappop(open_set)
+            if node in closed:
+                continue
+            closed.add(node)
+            stats["abstract"] += 1
+            if node == end:
+                break
+            successors = list(self.__edges.get(node, {}).items())
+            if node == start:
+                successors.extend(start_edges.items())
+            if node in to_end:
+                successors.append((end, to_end[node]))
+            for other, cost in successors:
+                tentative_g_score = g_score[node] + cost
+                if other not in g_score or tentative_g_score < g_score[other]:
+                    g_score[other] = tentative_g_score
+                    came_from[other] = node
+                    heapq.heappush(
+                        open_set, (tentative_g_score + heuristic(other), other)
+                    )
+        if end not in closed:
+            return None
+
+        abstract = [end]
+        while abstract[-1] != start:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+        return self.__refine(abstract, start_parent, end_parent)
+
+    def __refine(self, abstract, start_parent, end_parent):
+        start, end = abstract[0], abstract[-1]
+        path = [start]
+        for k in range(1, len(abstract)):
+            a, b = abstract[k - 1], abstract[k]
+            if a == start and b in start_parent:
+                segment = [b]
+                while segment[-1] != start:
+                    segment.append(start_parent[segment[-1]])
+                segment.reverse()
+                path.extend(segment[1:])
+            elif b == end and a in end_parent:
+                idx = a
+                while idx != end:
+                    idx = end_parent[idx]
+                    path.append(idx)
+            elif self.cluster(a) != self.cluster(b):
+                path.append(b)
+            else:
+                cluster = self.cluster(a)
+                _, parent, expanded = self.__search(a, cluster, target=b)
+                self.last_stats["refined"] += expanded
+                segment = [b]
+                while segment[-1] != a:
+                    segment.append(parent[segment[-1]])
+                segment.reverse()
+                path.extend(segment[1:])
+        return path
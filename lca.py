@@ -0,0 +1,76 @@
+from array import array
+
+
+class LcaIndex:
+    def __init__(self, graph, root=0):
+        size = len(graph)
+        if graph.num_edges() != size - 1:
+            raise ValueError("an LCA index needs a perfect maze (a spanning tree)")
+        offsets = graph.offsets
+        neighbors = graph.neighbors
+        parent = array("i", [-1]) * size
+        depth = array("i", [-1]) * size
+        parent[root] = root
+        depth[root] = 0
+        stack = [root]
+        reached = 1
+        while stack:
+            idx = stack.pop()
+            next_depth = depth[idx] + 1
+            for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                if depth[n_idx] < 0:
+                    parent[n_idx] = idx
+                    depth[n_idx] = next_depth
+                    stack.append(n_idx)
+                    reached += 1
+        if reached != size:
+            raise ValueError("an LCA index needs a connected maze")
+
+        up = [parent]
+        prev = parent.tolist()
+        for _ in range(max(depth).bit_length() - 1):
+            prev = [prev[p] for p in prev]
+            up.append(array("i", prev))
+        self.root = root
+        self.parent = parent
+        self.depth = depth
+        self.__up = up
+
+    def lca(self, a, b):
+        depth = self.depth
+        up = self.__up
+        if depth[a] < depth[b]:
+            a, b = b, a
+        diff = depth[a] - depth[b]
+        k = 0
+        while diff:
+            if diff & 1:
+                a = up[k][a]
+            diff >>= 1
+            k += 1
+        if a == b:
+            return a
+        for k in range(len(up) - 1, -1, -1):
+            if up[k][a] != up[k][b]:
+                a = up[k][a]
+                b = up[k][b]
+        return self.parent[a]
+
+    def distance(self, a, b):
+        depth = self.depth
+        return depth[a] + depth[b] - 2 * depth[self.lca(a, b)]
+
+    def path(self, a, b):
+        ancestor = self.lca(a, b)
+        parent = self.parent
+        head = [a]
+        while head[-1] != ancestor:
+            head.append(parent[head[-1]])
+        tail = []
+        idx = b
+        while idx != ancestor:
+            tail.append(idx)
+            idx = parent[idx]
+        tail.reverse()
+        head.extend(tail)
+        return head
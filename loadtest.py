@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+class HttpClient:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.__reader = None
+        self.__writer = None
+
+    async def request(self, method, target, payload=None):
+        if self.__writer is None:
+            self.__reader, self.__writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        body = b"" if payload is None else json.dumps(payload).encode()
+        head = (
+            f"{method} {target} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        self.__writer.write(head.encode("latin-1") + body)
+        await self.__writer.drain()
+        return await self.__read_response()
+
+    async def __read_response(self):
+        reader = self.__reader
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            parts = []
+            while True:
+                size = int((await reader.readline()).strip(), 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(parts)
+        else:
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, json.loads(body) if body else None
+
+    async def close(self):
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+            self.__reader = None
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def run_load(
+    host,
+    port,
+    requests=1000,
+    concurrency=32,
+    rows=100,
+    cols=100,
+    seed=0,
+    algorithm="bfs",
+    pairs=50,
+    endpoint="solve",
+):
+    setup = HttpClient(host, port)
+    status, maze = await setup.request(
+        "POST", "/generate", {"rows": rows, "cols": cols, "seed": seed}
+    )
+    await setup.close()
+    if status != 200:
+        raise RuntimeError(f"generate failed: {maze}")
+
+    rng = random.Random(seed)
+    cells = [
+        (
+            [rng.randrange(cols), rng.randrange(rows)],
+            [rng.randrange(cols), rng.randrange(rows)],
+        )
+        for _ in range(pairs)
+    ]
+    jobs = iter(rng.choice(cells) for _ in range(requests))
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        client = HttpClient(host, port)
+        try:
+            for start, end in jobs:
+                began = time.perf_counter()
+                if endpoint == "path":
+                    target = (
+                        f"/path?id={maze['id']}&start={start[0]},{start[1]}"
+                        f"&end={end[0]},{end[1]}"
+                    )
+                    status, _ = await client.request("GET", target)
+                else:
+                    status, _ = await client.request(
+                        "POST",
+                        "/solve",
+                        {
+                            "id": maze["id"],
+                            "algorithm": algorithm,
+                            "start": start,
+                            "end": end,
+                        },
+                    )
+                latencies.append(time.perf_counter() - began)
+                if status != 200:
+                    errors += 1
+        finally:
+            await client.close()
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - began
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a running maze server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--algorithm", default="bfs")
+    parser.add_argument(
+        "--pairs", type=int, default=50, help="distinct start/end pairs to draw from"
+    )
+    parser.add_argument("--endpoint", choices=("solve", "path"), default="solve")
+    args = parser.parse_args(argv)
+    report = asyncio.run(
+        run_load(
+            args.host,
+            args.port,
+            args.requests,
+            args.concurrency,
+            args.rows,
+            args.cols,
+            args.seed,
+            args.algorithm,
+            args.pairs,
+            args.endpoint,
+        )
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
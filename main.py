@@ -1,5 +1,7 @@
 from graphics import Window
 from maze import Maze
+from player import EventPlayer
+from tasks import BackgroundTask
 import time
 
 
@@ -27,15 +29,73 @@ def main():
         DEFAULT_CELL_SIZE,
     )
 
-    maze = Maze(
-        MARGIN,
-        MARGIN,
-        current_maze_params["num_rows"],
-        current_maze_params["num_cols"],
-        current_maze_params["cell_size_x"],
-        current_maze_params["cell_size_y"],
-        win,
-    )
+    def build_maze():
+        return Maze(
+            MARGIN,
+            MARGIN,
+            current_maze_params["num_rows"],
+            current_maze_params["num_cols"],
+            current_maze_params["cell_size_x"],
+            current_maze_params["cell_size_y"],
+            win,
+            seed=time.time(),
+        )
+
+    state = {"maze": build_maze(), "player": None, "task": None}
+    solve_buttons = []
+
+    def set_solving_enabled(enabled):
+        # A solve must never cancel a pending generation, so the solve buttons
+        # stay disabled until the new maze has arrived or the user cancels.
+        for button in solve_buttons:
+            win.set_button_enabled(button, enabled)
+
+    def stop():
+        if state["player"] is not None:
+            state["player"].stop()
+        previous = state["task"]
+        if previous is not None:
+            previous.cancel()
+        return previous
+
+    def play(from_blank=False):
+        maze = state["maze"]
+        state["player"] = EventPlayer(win, maze, maze.events)
+        state["player"].play(from_blank=from_blank)
+
+    def run(work, on_done, on_cancel=None, on_error=None):
+        previous = stop()
+
+        def finish(result):
+            if state["task"] is task:
+                state["task"] = None
+                on_done(result)
+
+        def cancelled():
+            if state["task"] is task:
+                state["task"] = None
+                if on_cancel is not None:
+                    on_cancel()
+
+        def failed(error):
+            if state["task"] is task:
+                state["task"] = None
+                if on_error is not None:
+                    on_error(error)
+                win.update_solve_time_label(f"Error: {error}")
+                print(f"Task failed: {error!r}")
+
+        task = BackgroundTask(
+            win,
+            work,
+            on_done=finish,
+            on_progress=win.update_solve_time_label,
+            on_cancel=cancelled,
+            on_error=failed,
+            after=previous,
+        )
+        state["task"] = task
+        task.start()
 
     def handle_new_maze():
         win.update_solve_time_label("")
@@ -48,13 +108,22 @@ def main():
             current_maze_params["cell_size_x"] = new_cell_size
             current_maze_params["cell_size_y"] = new_cell_size
 
-        maze.regenerate(
-            seed=time.time(),
-            num_rows=current_maze_params["num_rows"],
-            num_cols=current_maze_params["num_cols"],
-            cell_size_x=current_maze_params["cell_size_x"],
-            cell_size_y=current_maze_params["cell_size_y"],
-        )
+        def generated(maze):
+            state["maze"] = maze
+            set_solving_enabled(True)
+            win.update_solve_time_label("")
+            play(from_blank=True)
+
+        def cancelled():
+            set_solving_enabled(True)
+            win.update_solve_time_label("Generation cancelled.")
+
+        def work(task):
+            task.post("progress", "Generating...")
+            return build_maze()
+
+        set_solving_enabled(False)
+        run(work, generated, cancelled, lambda error: set_solving_enabled(True))
 
     def handle_solve_maze(algorithm="dfs"):
         algo_name = "DFS"
@@ -62,30 +131,60 @@ def main():
             algo_name = "BFS"
         elif algorithm == "astar":
             algo_name = "A*"
+        elif algorithm == "bibfs":
+            algo_name = "Bi-BFS"
+        elif algorithm == "biastar":
+            algo_name = "Bi-A*"
+
+        maze = state["maze"]
+
+        def work(task):
+            task.post("progress", f"Solving with {algo_name}...")
+            start_time = time.perf_counter()
+            result = maze.solve(algorithm=algorithm, cancel=task.cancelled)
+            return result, time.perf_counter() - start_time
+
+        def solved(outcome):
+            result, solve_duration = outcome
+            play()
+
+            if not result:
+                win.update_solve_time_label(
+                    f"{algo_name}: Not solvable. (Tried for {solve_duration:.3f}s)"
+                )
+                print(f"Maze ({algo_name}) is not solvable")
+            else:
+                win.update_solve_time_label(
+                    f"{algo_name}: Solved in {solve_duration:.3f} seconds! "
+                    f"(path {result.length}, expanded {result.expanded})"
+                )
+                print(f"Maze ({algo_name}) is solvable")
+
+        def cancelled():
+            win.update_solve_time_label(f"{algo_name}: Cancelled.")
+
+        run(work, solved, cancelled)
+
+    def handle_cancel():
+        if state["task"] is not None:
+            state["task"].cancel()
 
-        win.update_solve_time_label(f"Solving with {algo_name}...")
-        win.redraw()
-
-        start_time = time.perf_counter()
-        is_solvable = maze.solve(algorithm=algorithm)
-        end_time = time.perf_counter()
-        solve_duration = end_time - start_time
-
-        if not is_solvable:
-            win.update_solve_time_label(
-                f"{algo_name}: Not solvable. (Tried for {solve_duration:.3f}s)"
-            )
-            print(f"Maze ({algo_name}) is not solvable")
-        else:
-            win.update_solve_time_label(
-                f"{algo_name}: Solved in {solve_duration:.3f} seconds!"
+    win.add_button("New Maze", handle_new_maze)
+    for text, algorithm in (
+        ("Solve DFS", "dfs"),
+        ("Solve BFS", "bfs"),
+        ("Solve A*", "astar"),
+        ("Solve Bi-BFS", "bibfs"),
+        ("Solve Bi-A*", "biastar"),
+    ):
+        solve_buttons.append(
+            win.add_button(
+                text, lambda algorithm=algorithm: handle_solve_maze(algorithm)
             )
-            print(f"Maze ({algo_name}) is solvable")
+        )
+    win.add_button("Cancel", handle_cancel)
 
-    win.add_button("New Maze", handle_new_maze)
-    win.add_button("Solve DFS", lambda: handle_solve_maze(algorithm="dfs"))
-    win.add_button("Solve BFS", lambda: handle_solve_maze(algorithm="bfs"))
-    win.add_button("Solve A*", lambda: handle_solve_maze(algorithm="astar"))
+    play(from_blank=True)
 
     win.wait_for_close()
 
@@ -1,8 +1,31 @@
-from cell import Cell
+from array import array
+from cache import maze_fingerprint
+from cell import CellGrid
+from events import EventLog, CARVE, VISIT, BACKTRACK, PATH
+from distance import distance_field
+from dynamic import LpaStar
+from generators import GENERATORS, recursive_backtracker
+from graph import build_graph, prune_dead_ends
+from hpa import HpaIndex, CLUSTER_SIZE
+from lca import LcaIndex
+from multisolve import solve_pairs
+from mazefile import MazeFileError, check_seed, save_grid, open_grid
+from render import MazeRenderer
+from grid import WallGrid, LEFT, RIGHT, TOP, BOTTOM, OPPOSITE
+from result import SolveResult
+from terrain import check_weights, dial_shortest_path, shortest_path_scipy
+from tiles import TiledGrid
 import time
 import random
-from collections import deque 
-import heapq 
+from contextlib import nullcontext
+from collections import deque
+import heapq
+
+_NO_PHASE = nullcontext()
+
+
+class SolveCancelled(Exception):
+    pass
 
 
 class Maze:
@@ -16,6 +39,12 @@ class Maze:
         cell_size_y,
         win=None,
         seed=None,
+        storage=None,
+        record_events=None,
+        generate=True,
+        cache=None,
+        generator="backtracker",
+        stats=None,
     ):
         self.__x1 = x1
         self.__y1 = y1
@@ -24,107 +53,326 @@ class Maze:
         self.__cell_size_x = cell_size_x
         self.__cell_size_y = cell_size_y
         self.__win = win
-        self.__cells = []
-        if seed:
-            random.seed(seed)
+        if record_events is None:
+            record_events = win is not None
+        self.__events = EventLog() if record_events else None
+        if seed is None:
+            seed = time.time()
+        check_seed(seed)
+        self.__seed = seed
+        self.__rng = random.Random(seed)
+        self.__entrance = (0, 0)
+        self.__exit = None
+        self.__nodes_expanded = 0
+        self.__cache = cache
+        if generator not in GENERATORS:
+            raise ValueError(f"Unknown generator: {generator}")
+        self.__generator = generator
+        self.__stats = stats
+        self.__cancel = None
+
+        self.__create_cell(storage)
+        if generate:
+            self.__break_entrance_and_exit()
+            self.__carve_passages()
+            self.__reset_cell_visited()
+
+    @property
+    def stats(self):
+        return self.__stats
+
+    def __phase(self, name):
+        if self.__stats is None:
+            return _NO_PHASE
+        return self.__stats.phase(name)
+
+    def __count(self, name, amount):
+        if self.__stats is not None:
+            self.__stats.count(name, amount)
+
+    @property
+    def grid(self):
+        return self.__grid
+
+    @property
+    def graph(self):
+        if self.__graph is None:
+            self.__graph = build_graph(self.__grid)
+        return self.__graph
+
+    def pruned_graph(self, start=(0, 0), end=None):
+        if end is None:
+            end = (self.__num_cols - 1, self.__num_rows - 1)
+        rows = self.__num_rows
+        key = (start[0] * rows + start[1], end[0] * rows + end[1])
+        if key not in self.__pruned_graphs:
+            self.__pruned_graphs[key] = prune_dead_ends(self.graph, key)
+        return self.__pruned_graphs[key]
+
+    @property
+    def lca_index(self):
+        if self.__lca_index is None:
+            self.__lca_index = LcaIndex(self.graph)
+        return self.__lca_index
+
+    @property
+    def hpa_index(self):
+        if self.__hpa is None:
+            self.__hpa = HpaIndex(self.__grid)
+        return self.__hpa
+
+    def build_hpa_index(self, cluster_size=CLUSTER_SIZE):
+        self.__hpa = HpaIndex(self.__grid, cluster_size)
+        return self.__hpa
+
+    def path_length(self, a, b):
+        rows = self.__num_rows
+        return self.lca_index.distance(a[0] * rows + a[1], b[0] * rows + b[1])
+
+    def path(self, a, b):
+        rows = self.__num_rows
+        path = self.lca_index.path(a[0] * rows + a[1], b[0] * rows + b[1])
+        return [divmod(idx, rows) for idx in path]
+
+    @property
+    def fingerprint(self):
+        if self.__fingerprint is None:
+            self.__fingerprint = maze_fingerprint(self.__grid, self.__seed)
+        return self.__fingerprint
+
+    @property
+    def seed(self):
+        return self.__seed
+
+    @property
+    def entrance(self):
+        return self.__entrance
+
+    @property
+    def exit(self):
+        if self.__exit is None:
+            return (self.__num_cols - 1, self.__num_rows - 1)
+        return self.__exit
+
+    @property
+    def generator(self):
+        return self.__generator
+
+    @property
+    def num_rows(self):
+        return self.__num_rows
+
+    @property
+    def num_cols(self):
+        return self.__num_cols
+
+    @property
+    def events(self):
+        return self.__events
+
+    @property
+    def nodes_expanded(self):
+        return self.__nodes_expanded
+
+    def __create_cell(self, storage=None):
+        if storage is None:
+            with self.__phase("allocate"):
+                storage = WallGrid(self.__num_cols, self.__num_rows)
+        elif (storage.num_cols, storage.num_rows) != (
+            self.__num_cols,
+            self.__num_rows,
+        ):
+            raise ValueError("storage dimensions do not match the maze")
+        self.__grid = storage
+        self.__cells = CellGrid(self.__grid, self.__win)
+        self.__lpa = None
+        self.__hpa = None
+        self.__reset_derived()
+
+    def __reset_derived(self):
+        self.__graph = None
+        self.__pruned_graphs = {}
+        self.__lca_index = None
+        self.__fingerprint = None
+
+    @property
+    def weights(self):
+        return self.__grid.weights
+
+    def set_weights(self, weights):
+        if weights is not None:
+            weights = bytearray(weights)
+            check_weights(weights, len(self.__grid))
+        self.__grid.weights = weights
+        self.__fingerprint = None
+        self.__lpa = None
+        self.__hpa = None
+
+    @property
+    def cells_touched(self):
+        if self.__lpa is None:
+            return 0
+        return self.__lpa.touched
+
+    def set_wall(self, i, j, side, present):
+        if side not in OPPOSITE:
+            raise ValueError(f"Unknown wall side: {side}")
+        if not (0 <= i < self.__num_cols and 0 <= j < self.__num_rows):
+            raise IndexError(f"cell {(i, j)} is outside the maze")
+        ni, nj = i, j
+        if side == LEFT:
+            ni -= 1
+        elif side == RIGHT:
+            ni += 1
+        elif side == TOP:
+            nj -= 1
         else:
-            random.seed(time.time())
-
-        self.__create_cell()
-        self.__break_entrance_and_exit()
-        self._break_walls_iterative(0, 0)
-        self.__reset_cell_visited()
-
-    def __create_cell(self):
-        for i in range(self.__num_cols):
-            col_cells = []
-            for j in range(self.__num_rows):
-                col_cells.append(Cell(self.__win))
-            self.__cells.append(col_cells)
-
-        for i in range(self.__num_cols):
-            for j in range(self.__num_rows):
-                self.__draw_cell(i, j)
-
-    def __draw_cell(self, i, j, animate=True):
-        if self.__win is None:
-            return
+            nj += 1
+        self.__grid.set_wall(i, j, side, present)
+        inside = 0 <= ni < self.__num_cols and 0 <= nj < self.__num_rows
+        if inside:
+            self.__grid.set_wall(ni, nj, OPPOSITE[side], present)
+        self.__reset_derived()
+        rows = self.__num_rows
+        if inside and self.__lpa is not None:
+            self.__lpa.update_edge(i * rows + j, ni * rows + nj)
+        if inside and self.__hpa is not None:
+            self.__hpa.update_edge(i * rows + j, ni * rows + nj)
+        if self.__win is not None:
+            renderer = MazeRenderer(self.__win, self)
+            if present:
+                renderer.draw_wall(i, j, ni, nj)
+            else:
+                renderer.erase_wall(i, j, ni, nj)
+
+    def _solve_lpastar(self, graph=None, start=0, end=None):
+        if end is None:
+            end = len(self.__grid) - 1
+        lpa = self.__lpa
+        if lpa is None or (lpa.start, lpa.end) != (start, end):
+            lpa = self.__lpa = LpaStar(self.__grid, start, end)
+        path = lpa.compute()
+        self.__nodes_expanded = lpa.touched
+        if path is None:
+            return None
+        rows = self.__num_rows
+        path = [divmod(idx, rows) for idx in path]
+        self.__record_path(path)
+        return path
+
+    def _solve_hpastar(self, graph=None, start=0, end=None):
+        if end is None:
+            end = len(self.__grid) - 1
+        hpa = self.hpa_index
+        path = hpa.search(start, end)
+        self.__nodes_expanded = sum(hpa.last_stats.values())
+        if path is None:
+            return None
+        rows = self.__num_rows
+        path = [divmod(idx, rows) for idx in path]
+        self.__record_path(path)
+        return path
+
+    def save(self, path):
+        save_grid(
+            path, self.__grid, self.__seed, self.generator, self.entrance, self.exit
+        )
+
+    @classmethod
+    def load(
+        cls, path, x1=0, y1=0, cell_size_x=10, cell_size_y=10, win=None, **kwargs
+    ):
+        grid, header = open_grid(path)
+        for name in ("entrance", "exit"):
+            i, j = header[name]
+            if not (0 <= i < header["num_cols"] and 0 <= j < header["num_rows"]):
+                raise MazeFileError(f"{name} {header[name]} is outside the maze")
+        maze = cls(
+            x1,
+            y1,
+            header["num_rows"],
+            header["num_cols"],
+            cell_size_x,
+            cell_size_y,
+            win,
+            seed=header["seed"],
+            generator=header["generator"],
+            storage=grid,
+            generate=False,
+            **kwargs,
+        )
+        maze.__entrance = header["entrance"]
+        maze.__exit = header["exit"]
+        return maze
+
+    def cell_bounds(self, i, j):
         x1 = self.__x1 + i * self.__cell_size_x
         y1 = self.__y1 + j * self.__cell_size_y
-        x2 = x1 + self.__cell_size_x
-        y2 = y1 + self.__cell_size_y
-        self.__cells[i][j].draw(x1, y1, x2, y2)
-        if animate:
-            self.__animate()
+        return x1, y1, x1 + self.__cell_size_x, y1 + self.__cell_size_y
 
-    def __animate(self):
+    def draw(self):
         if self.__win is None:
             return
-        self.__win.redraw()
-        time.sleep(0.01)
+        MazeRenderer(self.__win, self).draw_maze()
+
+    def __record(self, op, i, j, ni, nj):
+        if self.__cancel is not None and self.__cancel.is_set():
+            raise SolveCancelled()
+        if self.__events is not None:
+            self.__events.record(op, i, j, ni, nj)
+
+    def __recorder(self):
+        # Solvers bind this once and skip the per-expansion call when nothing
+        # is listening, so headless solves pay nothing for the hook.
+        if self.__events is None and self.__cancel is None:
+            return None
+        return self.__record
+
+    def __record_path(self, path):
+        if self.__events is None:
+            return
+        for k in range(len(path) - 1):
+            self.__events.record(PATH, *path[k], *path[k + 1])
 
     def __break_entrance_and_exit(self):
-        self.__cells[0][0].has_top_wall = False
-        self.__cells[self.__num_cols - 1][self.__num_rows - 1].has_bottom_wall = False
-        if self.__win is None:
-            return
-        self.__draw_cell(0, 0)
-        self.__draw_cell(self.__num_cols - 1, self.__num_rows - 1)
+        self.__grid.set_wall(0, 0, TOP, False)
+        self.__grid.set_wall(self.__num_cols - 1, self.__num_rows - 1, BOTTOM, False)
+        self.__record(CARVE, 0, 0, 0, -1)
+        self.__record(
+            CARVE,
+            self.__num_cols - 1,
+            self.__num_rows - 1,
+            self.__num_cols - 1,
+            self.__num_rows,
+        )
 
     def _break_walls_iterative(self, start_i, start_j):
-        stack = [] 
-        self.__cells[start_i][start_j].visited = True
-        stack.append((start_i, start_j))
-        self.__animate() 
-
-        while stack:
-            curr_i, curr_j = stack[-1] 
-
-            next_index_list = []
-            if curr_i > 0 and not self.__cells[curr_i - 1][curr_j].visited: 
-                next_index_list.append((curr_i - 1, curr_j))
-            if curr_i < self.__num_cols - 1 and not self.__cells[curr_i + 1][curr_j].visited: 
-                next_index_list.append((curr_i + 1, curr_j))
-            if curr_j > 0 and not self.__cells[curr_i][curr_j - 1].visited: 
-                next_index_list.append((curr_i, curr_j - 1))
-            if curr_j < self.__num_rows - 1 and not self.__cells[curr_i][curr_j + 1].visited: 
-                next_index_list.append((curr_i, curr_j + 1))
-
-            if not next_index_list: 
-                self.__draw_cell(curr_i, curr_j) 
-                stack.pop()
-                continue
+        recursive_backtracker(
+            self.__grid, self.__rng, self.__events, (start_i, start_j)
+        )
 
-            next_i, next_j = random.choice(next_index_list)
-
-            if next_i == curr_i + 1: 
-                self.__cells[curr_i][curr_j].has_right_wall = False
-                self.__cells[next_i][curr_j].has_left_wall = False
-            elif next_i == curr_i - 1: 
-                self.__cells[curr_i][curr_j].has_left_wall = False
-                self.__cells[next_i][curr_j].has_right_wall = False
-            elif next_j == curr_j + 1: 
-                self.__cells[curr_i][curr_j].has_bottom_wall = False
-                self.__cells[next_i][curr_j + 1].has_top_wall = False 
-            elif next_j == curr_j - 1: 
-                self.__cells[curr_i][curr_j].has_top_wall = False
-                self.__cells[next_i][curr_j - 1].has_bottom_wall = False 
-
-            self.__draw_cell(curr_i, curr_j) 
-            self.__cells[next_i][next_j].visited = True
-            self.__draw_cell(next_i, next_j) 
-            stack.append((next_i, next_j))
-            self.__animate() 
+    def __carve_passages(self):
+        with self.__phase("carve"):
+            if self.__generator == "backtracker":
+                self._break_walls_iterative(0, 0)
+            else:
+                GENERATORS[self.__generator](self.__grid, self.__rng, self.__events)
 
     def __reset_cell_visited(self):
-        for col in self.__cells:
-            for cell in col:
-                cell.visited = False
+        with self.__phase("reset_visited"):
+            self.__grid.reset_visited()
 
-    def regenerate(self, seed=None, num_rows=None, num_cols=None, cell_size_x=None, cell_size_y=None):
-        if self.__win is not None:
-            self.__win.clear_canvas()
-        
+    def regenerate(self, seed=None, num_rows=None, num_cols=None, cell_size_x=None, cell_size_y=None, generator=None):
+        if seed is not None:
+            check_seed(seed)
+        # Tiled storage is regenerated in place rather than reallocated in RAM,
+        # so its file fixes the maze's dimensions.
+        storage = self.__grid if isinstance(self.__grid, TiledGrid) else None
+        if storage is not None and (
+            (num_cols is not None and num_cols != self.__num_cols)
+            or (num_rows is not None and num_rows != self.__num_rows)
+        ):
+            raise ValueError("tiled storage cannot be resized by regenerate")
         if num_rows is not None:
             self.__num_rows = num_rows
         if num_cols is not None:
@@ -133,251 +381,443 @@ class Maze:
             self.__cell_size_x = cell_size_x
         if cell_size_y is not None:
             self.__cell_size_y = cell_size_y
-            
-        if seed is not None:
-            random.seed(seed)
-        else:
-            random.seed(time.time())
-
-        self.__cells = []
-        self.__create_cell()
+        if generator is not None:
+            if generator not in GENERATORS:
+                raise ValueError(f"Unknown generator: {generator}")
+            self.__generator = generator
+
+        if seed is None:
+            seed = time.time()
+        self.__seed = seed
+        self.__rng = random.Random(seed)
+        self.__entrance = (0, 0)
+        self.__exit = None
+        if self.__events is not None:
+            self.__events.clear()
+
+        if storage is not None:
+            with self.__phase("allocate"):
+                storage.clear()
+        self.__create_cell(storage)
         self.__break_entrance_and_exit()
-        self._break_walls_iterative(0, 0)
+        self.__carve_passages()
         self.__reset_cell_visited()
-        for i in range(self.__num_cols):
-            for j in range(self.__num_rows):
-                self.__draw_cell(i, j, animate=False)
-        if self.__win is not None:
-            self.__win.redraw()
 
-    def _solve_dfs_iterative(self):
-        stack = [] 
-        start_node = (0,0)
-        end_node = (self.__num_cols - 1, self.__num_rows - 1)
-        stack.append((start_node, [])) 
-        visited_dfs = set()
-        visited_dfs.add(start_node)
+    def distance_field(self, source=(0, 0)):
+        i, j = source
+        return distance_field(self.graph, i * self.__num_rows + j)
+
+    def __path_from_parents(self, parent, start, end):
+        rows = self.__num_rows
+        path = [divmod(end, rows)]
+        idx = end
+        while idx != start:
+            idx = parent[idx]
+            path.append(divmod(idx, rows))
+        path.reverse()
+        return path
+
+    def _solve_dfs_iterative(self, graph=None, start=0, end=None):
+        if graph is None:
+            graph = self.graph
+        if end is None:
+            end = len(graph) - 1
+        offsets = graph.offsets
+        neighbors = graph.neighbors
+        rows = self.__num_rows
+        record = self.__recorder()
+        parent = array("i", [-1]) * len(graph)
+        parent[start] = start
+        stack = [start]
+        expanded = 0
 
         while stack:
-            (curr_i, curr_j), path = stack.pop()
-
-            self.__cells[curr_i][curr_j].visited = True 
-            if path: 
-                (prev_cell_coords, current_cell_coords) = path[-1]
-                self.__cells[prev_cell_coords[0]][prev_cell_coords[1]].draw_move(self.__cells[current_cell_coords[0]][current_cell_coords[1]])
-                self.__animate()
-
-            if (curr_i, curr_j) == end_node:
-                if self.__win is not None:
-                    self.__win.clear_canvas()
-                    for r_i in range(self.__num_cols):
-                        for r_j in range(self.__num_rows):
-                            self.__draw_cell(r_i,r_j, animate=False)
-                    self.__win.redraw()
-                
-                
-                for path_segment in path:
-                    (prev_i, prev_j), (next_i, next_j) = path_segment
-                    self.__cells[prev_i][prev_j].draw_move(self.__cells[next_i][next_j])
-                    self.__animate()
-                return True 
-
-            potential_moves = []
-            if curr_i < self.__num_cols - 1 and not self.__cells[curr_i][curr_j].has_right_wall:
-                potential_moves.append((curr_i + 1, curr_j))
-            if curr_j < self.__num_rows - 1 and not self.__cells[curr_i][curr_j].has_bottom_wall:
-                potential_moves.append((curr_i, curr_j + 1))
-            if curr_i > 0 and not self.__cells[curr_i][curr_j].has_left_wall:
-                potential_moves.append((curr_i - 1, curr_j))
-            if curr_j > 0 and not self.__cells[curr_i][curr_j].has_top_wall:
-                potential_moves.append((curr_i, curr_j - 1))
-            
+            idx = stack.pop()
+            expanded += 1
+            if record is not None and idx != start:
+                record(VISIT, *divmod(parent[idx], rows), *divmod(idx, rows))
+
+            if idx == end:
+                self.__nodes_expanded = expanded
+                path = self.__path_from_parents(parent, start, end)
+                self.__record_path(path)
+                return path
+
             found_next_step = False
-            for next_i, next_j in reversed(potential_moves): 
-                if (next_i, next_j) not in visited_dfs:
-                    visited_dfs.add((next_i, next_j))
-                    new_path_segment = ((curr_i, curr_j), (next_i, next_j))
-                    stack.append(((next_i, next_j), path + [new_path_segment]))
-                    found_next_step = True 
-            
-            if not found_next_step and path: 
-                (prev_cell_coords, current_cell_coords) = path[-1]
-                self.__cells[prev_cell_coords[0]][prev_cell_coords[1]].draw_move(self.__cells[current_cell_coords[0]][current_cell_coords[1]], True)
-                self.__animate()
-
-        return False
-
-    def _solve_bfs(self):
+            for n_idx in reversed(neighbors[offsets[idx] : offsets[idx + 1]]):
+                if parent[n_idx] < 0:
+                    parent[n_idx] = idx
+                    stack.append(n_idx)
+                    found_next_step = True
+
+            if record is not None and not found_next_step and idx != start:
+                record(BACKTRACK, *divmod(parent[idx], rows), *divmod(idx, rows))
+
+        self.__nodes_expanded = expanded
+        return None
+
+    def _solve_bfs(self, graph=None, start=0, end=None):
+        if graph is None:
+            graph = self.graph
+        if end is None:
+            end = len(graph) - 1
+        offsets = graph.offsets
+        neighbors = graph.neighbors
+        rows = self.__num_rows
+        record = self.__recorder()
+        parent = array("i", [-1]) * len(graph)
+        parent[start] = start
         q = deque()
-        q.append(((0,0), [])) 
-        visited_bfs = set()
-        visited_bfs.add((0,0))
-        parent_map = {} 
-
-        start_node = (0,0)
-        end_node = (self.__num_cols - 1, self.__num_rows - 1)
+        q.append(start)
+        expanded = 0
 
         while q:
-            (curr_i, curr_j), path = q.popleft()
-            
-            if (curr_i, curr_j) != start_node:
-                prev_i, prev_j = parent_map[(curr_i, curr_j)]
-                self.__cells[prev_i][prev_j].draw_move(self.__cells[curr_i][curr_j])
-                self.__animate() 
-
-            if (curr_i, curr_j) == end_node:
-                
-                solution_path = []
-                temp_i, temp_j = end_node
-                while (temp_i, temp_j) != start_node:
-                    solution_path.append((temp_i, temp_j))
-                    prev_i, prev_j = parent_map[(temp_i, temp_j)]
-                    temp_i, temp_j = prev_i, prev_j
-                solution_path.append(start_node)
-                solution_path.reverse()
-
-                
-                if self.__win is not None:
-                    self.__win.clear_canvas()
-                    for r_i in range(self.__num_cols):
-                        for r_j in range(self.__num_rows):
-                            self.__draw_cell(r_i,r_j, animate=False)
-                    self.__win.redraw()
-                
-                
-                for k in range(len(solution_path) - 1):
-                    p1_i, p1_j = solution_path[k]
-                    p2_i, p2_j = solution_path[k+1]
-                    self.__cells[p1_i][p1_j].draw_move(self.__cells[p2_i][p2_j])
-                    self.__animate()
-                return True
-
-            
-            possible_moves = []
-            
-            if curr_i > 0 and not self.__cells[curr_i][curr_j].has_left_wall:
-                possible_moves.append((curr_i - 1, curr_j))
-            
-            if curr_i < self.__num_cols - 1 and not self.__cells[curr_i][curr_j].has_right_wall:
-                possible_moves.append((curr_i + 1, curr_j))
-            
-            if curr_j > 0 and not self.__cells[curr_i][curr_j].has_top_wall:
-                possible_moves.append((curr_i, curr_j - 1))
-            
-            if curr_j < self.__num_rows - 1 and not self.__cells[curr_i][curr_j].has_bottom_wall:
-                possible_moves.append((curr_i, curr_j + 1))
-
-            for next_i, next_j in possible_moves:
-                if (next_i, next_j) not in visited_bfs:
-                    visited_bfs.add((next_i, next_j))
-                    parent_map[(next_i, next_j)] = (curr_i, curr_j)
-                    new_path = list(path)
-                    new_path.append((next_i, next_j))
-                    q.append(((next_i, next_j), new_path))
-                    
-        
-        return False 
-
-    def _heuristic(self, p1_coords, p2_coords):
-        
-        return abs(p1_coords[0] - p2_coords[0]) + abs(p1_coords[1] - p2_coords[1])
-
-    def _solve_astar(self):
-        start_node = (0, 0)
-        end_node = (self.__num_cols - 1, self.__num_rows - 1)
-
-        open_set = []  
-        heapq.heappush(open_set, (0, start_node)) 
-        
-        came_from = {} 
-
-        g_score = { (i,j): float('inf') for i in range(self.__num_cols) for j in range(self.__num_rows) }
-        g_score[start_node] = 0
-
-        f_score = { (i,j): float('inf') for i in range(self.__num_cols) for j in range(self.__num_rows) }
-        f_score[start_node] = self._heuristic(start_node, end_node)
-
-        open_set_hash = {start_node} 
+            idx = q.popleft()
+            expanded += 1
+
+            if record is not None and idx != start:
+                record(VISIT, *divmod(parent[idx], rows), *divmod(idx, rows))
+
+            if idx == end:
+                self.__nodes_expanded = expanded
+                path = self.__path_from_parents(parent, start, end)
+                self.__record_path(path)
+                return path
+
+            for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                if parent[n_idx] < 0:
+                    parent[n_idx] = idx
+                    q.append(n_idx)
+
+        self.__nodes_expanded = expanded
+        return None
+
+    def _solve_astar(self, graph=None, start=0, end=None):
+        if graph is None:
+            graph = self.graph
+        if end is None:
+            end = len(graph) - 1
+        offsets = graph.offsets
+        neighbors = graph.neighbors
+        rows = self.__num_rows
+        record = self.__recorder()
+        end_i, end_j = divmod(end, rows)
+        weights = self.__grid.weights
+        if weights is None:
+            weights = bytes([1]) * len(graph)
+        min_weight = min(weights) if len(weights) else 1
+
+        came_from = array("i", [-1]) * len(graph)
+        g_score = array("i", [-1]) * len(graph)
+        closed = bytearray(len(graph))
+        came_from[start] = start
+        g_score[start] = 0
+        start_i, start_j = divmod(start, rows)
+        h = (abs(end_i - start_i) + abs(end_j - start_j)) * min_weight
+        open_set = [(h, h, start)]
+        expanded = 0
+        pushes = 1
 
         while open_set:
-            _, current_coords = heapq.heappop(open_set)
-            open_set_hash.remove(current_coords)
-
-            curr_i, curr_j = current_coords
-
-            
-            if current_coords != start_node:
-                prev_i, prev_j = came_from[current_coords]
-                self.__cells[prev_i][prev_j].draw_move(self.__cells[curr_i][curr_j])
-                self.__animate()
-
-            if current_coords == end_node:
-                
-                solution_path = []
-                temp_coords = end_node
-                while temp_coords in came_from:
-                    solution_path.append(temp_coords)
-                    temp_coords = came_from[temp_coords]
-                solution_path.append(start_node)
-                solution_path.reverse()
-
-                if self.__win is not None:
-                    self.__win.clear_canvas()
-                    for r_i in range(self.__num_cols):
-                        for r_j in range(self.__num_rows):
-                            self.__draw_cell(r_i,r_j, animate=False)
-                    self.__win.redraw()
-                
-                for k in range(len(solution_path) - 1):
-                    p1_i, p1_j = solution_path[k]
-                    p2_i, p2_j = solution_path[k+1]
-                    self.__cells[p1_i][p1_j].draw_move(self.__cells[p2_i][p2_j])
-                    self.__animate()
-                return True
-
-            
-            possible_next_nodes = []
-            
-            if curr_i > 0 and not self.__cells[curr_i][curr_j].has_left_wall:
-                possible_next_nodes.append((curr_i - 1, curr_j))
-            
-            if curr_i < self.__num_cols - 1 and not self.__cells[curr_i][curr_j].has_right_wall:
-                possible_next_nodes.append((curr_i + 1, curr_j))
-            
-            if curr_j > 0 and not self.__cells[curr_i][curr_j].has_top_wall:
-                possible_next_nodes.append((curr_i, curr_j - 1))
-            
-            if curr_j < self.__num_rows - 1 and not self.__cells[curr_i][curr_j].has_bottom_wall:
-                possible_next_nodes.append((curr_i, curr_j + 1))
-
-            for neighbor_coords in possible_next_nodes:
-                tentative_g_score = g_score[current_coords] + 1 
-
-                if tentative_g_score < g_score[neighbor_coords]:
-                    came_from[neighbor_coords] = current_coords
-                    g_score[neighbor_coords] = tentative_g_score
-                    f_score[neighbor_coords] = tentative_g_score + self._heuristic(neighbor_coords, end_node)
-                    if neighbor_coords not in open_set_hash:
-                        heapq.heappush(open_set, (f_score[neighbor_coords], neighbor_coords))
-                        open_set_hash.add(neighbor_coords)
-        
-        return False 
-
-    def solve(self, algorithm="dfs"):
-        self.__reset_cell_visited()
-        if self.__win is not None:
-            self.__win.clear_canvas()
-            for i in range(self.__num_cols):
-                for j in range(self.__num_rows):
-                    self.__draw_cell(i,j, animate=False)
-            self.__win.redraw()
-
-        if algorithm == "dfs":
-            return self._solve_dfs_iterative()
-        elif algorithm == "bfs":
-            return self._solve_bfs()
-        elif algorithm == "astar":
-            return self._solve_astar()
-        else:
+            _, _, idx = heapq.heappop(open_set)
+            if closed[idx]:
+                continue
+            closed[idx] = 1
+            expanded += 1
+
+            if record is not None and idx != start:
+                record(VISIT, *divmod(came_from[idx], rows), *divmod(idx, rows))
+
+            if idx == end:
+                self.__nodes_expanded = expanded
+                self.__count("heap_pushes", pushes)
+                path = self.__path_from_parents(came_from, start, end)
+                self.__record_path(path)
+                return path
+
+            for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                if closed[n_idx]:
+                    continue
+                tentative_g_score = g_score[idx] + weights[n_idx]
+                if g_score[n_idx] < 0 or tentative_g_score < g_score[n_idx]:
+                    came_from[n_idx] = idx
+                    g_score[n_idx] = tentative_g_score
+                    n_i, n_j = divmod(n_idx, rows)
+                    h = (abs(end_i - n_i) + abs(end_j - n_j)) * min_weight
+                    heapq.heappush(open_set, (tentative_g_score + h, h, n_idx))
+                    pushes += 1
+
+        self.__nodes_expanded = expanded
+        self.__count("heap_pushes", pushes)
+        return None
+
+    def _solve_dijkstra(self, graph=None, start=0, end=None):
+        if graph is None:
+            graph = self.graph
+        if end is None:
+            end = len(graph) - 1
+        weights = self.__grid.weights
+        if weights is None:
+            weights = bytes([1]) * len(graph)
+
+        if self.__events is None and self.__cancel is None:
+            try:
+                parent, expanded = shortest_path_scipy(graph, weights, start, end)
+            except ImportError:
+                pass
+            else:
+                self.__nodes_expanded = expanded
+                if parent is None:
+                    return None
+                return self.__path_from_parents(parent, start, end)
+
+        rows = self.__num_rows
+        record = None
+        if self.__events is not None or self.__cancel is not None:
+
+            def record(parent_idx, idx):
+                self.__record(VISIT, *divmod(parent_idx, rows), *divmod(idx, rows))
+
+        parent, expanded = dial_shortest_path(graph, weights, start, end, record)
+        self.__nodes_expanded = expanded
+        if parent is None:
+            return None
+        path = self.__path_from_parents(parent, start, end)
+        self.__record_path(path)
+        return path
+
+    def solve_many(self, pairs, algorithm="bfs", workers=1):
+        rows = self.__num_rows
+        if algorithm == "lca":
+            index = self.lca_index
+            for start, end in pairs:
+                path = index.path(start[0] * rows + start[1], end[0] * rows + end[1])
+                path = [divmod(idx, rows) for idx in path]
+                yield start, end, SolveResult(algorithm, path)
+            return
+        if algorithm != "bfs":
+            raise ValueError(f"Unknown algorithm for solve_many: {algorithm}")
+
+        flat_pairs = [
+            (start[0] * rows + start[1], end[0] * rows + end[1]) for start, end in pairs
+        ]
+        groups = solve_pairs(self.graph, self.__grid, flat_pairs, workers)
+        for source, results in groups:
+            start = divmod(source, rows)
+            for goal, path, expanded in results:
+                if path is not None:
+                    path = [divmod(idx, rows) for idx in path]
+                yield start, divmod(goal, rows), SolveResult(algorithm, path, expanded)
+
+    def __join_paths(self, forward, backward, start, end, meet):
+        a, b = meet
+        path = self.__path_from_parents(forward, start, a)
+        tail = self.__path_from_parents(backward, end, b)
+        if a == b:
+            tail.pop()
+        tail.reverse()
+        path.extend(tail)
+        self.__record_path(path)
+        return path
+
+    def _solve_bibfs(self, graph=None, start=0, end=None):
+        if graph is None:
+            graph = self.graph
+        if end is None:
+            end = len(graph) - 1
+        offsets = graph.offsets
+        neighbors = graph.neighbors
+        rows = self.__num_rows
+        record = self.__recorder()
+        parents = (array("i", [-1]) * len(graph), array("i", [-1]) * len(graph))
+        dists = (array("i", [-1]) * len(graph), array("i", [-1]) * len(graph))
+        parents[0][start] = start
+        parents[1][end] = end
+        dists[0][start] = 0
+        dists[1][end] = 0
+        frontiers = ([start], [end])
+        expanded = 0
+        best = None
+        meet = (start, start)
+        if start == end:
+            best = 0
+
+        while best is None and frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            parent = parents[side]
+            dist = dists[side]
+            other_dist = dists[1 - side]
+            next_frontier = []
+            for idx in frontiers[side]:
+                expanded += 1
+                if record is not None and idx != parent[idx]:
+                    record(VISIT, *divmod(parent[idx], rows), *divmod(idx, rows))
+                for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                    if other_dist[n_idx] >= 0:
+                        length = dist[idx] + 1 + other_dist[n_idx]
+                        if best is None or length < best:
+                            best = length
+                            meet = (idx, n_idx) if side == 0 else (n_idx, idx)
+                    if parent[n_idx] < 0:
+                        parent[n_idx] = idx
+                        dist[n_idx] = dist[idx] + 1
+                        next_frontier.append(n_idx)
+            frontiers = (
+                (next_frontier, frontiers[1])
+                if side == 0
+                else (frontiers[0], next_frontier)
+            )
+
+        self.__nodes_expanded = expanded
+        if best is None:
+            return None
+        return self.__join_paths(parents[0], parents[1], start, end, meet)
+
+    def _solve_biastar(self, graph=None, start=0, end=None):
+        if graph is None:
+            graph = self.graph
+        if end is None:
+            end = len(graph) - 1
+        offsets = graph.offsets
+        neighbors = graph.neighbors
+        rows = self.__num_rows
+        record = self.__recorder()
+        start_i, start_j = divmod(start, rows)
+        end_i, end_j = divmod(end, rows)
+        weights = self.__grid.weights
+        min_weight = min(weights) if weights is not None and len(weights) else 1
+
+        def potential(idx):
+            i, j = divmod(idx, rows)
+            to_end = abs(end_i - i) + abs(end_j - j)
+            to_start = abs(start_i - i) + abs(start_j - j)
+            return (to_end - to_start) * min_weight
+
+        # Both searches use the balanced potential (h_end - h_start) / 2, kept
+        # doubled so keys stay integers; keys are then reduced distances and
+        # the bidirectional Dijkstra stopping rule applies. A step costs the
+        # weight of the cell it enters in the forward direction, so the
+        # backward search charges the cell it leaves.
+        came_from = (array("i", [-1]) * len(graph), array("i", [-1]) * len(graph))
+        g_scores = (array("i", [-1]) * len(graph), array("i", [-1]) * len(graph))
+        closed = (bytearray(len(graph)), bytearray(len(graph)))
+        signs = (1, -1)
+        offsets_key = (-potential(start), potential(end))
+        open_sets = ([(0, start)], [(0, end)])
+        came_from[0][start] = start
+        came_from[1][end] = end
+        g_scores[0][start] = 0
+        g_scores[1][end] = 0
+        expanded = 0
+        pushes = 2
+        best = None
+        meet = (start, start)
+        if start == end:
+            best = 0
+
+        while open_sets[0] and open_sets[1]:
+            if best is not None and (
+                open_sets[0][0][0] + open_sets[1][0][0]
+                >= 2 * best + offsets_key[0] + offsets_key[1]
+            ):
+                break
+            side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+            open_set = open_sets[side]
+            _, idx = heapq.heappop(open_set)
+            if closed[side][idx]:
+                continue
+            closed[side][idx] = 1
+            expanded += 1
+            parent = came_from[side]
+            g_score = g_scores[side]
+            other_g = g_scores[1 - side]
+            if record is not None and idx != parent[idx]:
+                record(VISIT, *divmod(parent[idx], rows), *divmod(idx, rows))
+
+            sign = signs[side]
+            offset = offsets_key[side]
+            tentative_g_score = g_score[idx] + 1
+            if weights is not None and side == 1:
+                tentative_g_score = g_score[idx] + weights[idx]
+            for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                if weights is not None and side == 0:
+                    tentative_g_score = g_score[idx] + weights[n_idx]
+                if other_g[n_idx] >= 0:
+                    length = tentative_g_score + other_g[n_idx]
+                    if best is None or length < best:
+                        best = length
+                        meet = (idx, n_idx) if side == 0 else (n_idx, idx)
+                if closed[side][n_idx]:
+                    continue
+                if g_score[n_idx] < 0 or tentative_g_score < g_score[n_idx]:
+                    parent[n_idx] = idx
+                    g_score[n_idx] = tentative_g_score
+                    key = 2 * tentative_g_score + sign * potential(n_idx) + offset
+                    heapq.heappush(open_set, (key, n_idx))
+                    pushes += 1
+
+        self.__nodes_expanded = expanded
+        self.__count("heap_pushes", pushes)
+        if best is None:
+            return None
+        return self.__join_paths(came_from[0], came_from[1], start, end, meet)
+
+    def solve(
+        self,
+        algorithm="dfs",
+        graph=None,
+        start=None,
+        end=None,
+        prune=False,
+        cancel=None,
+    ):
+        if start is None:
+            start = self.entrance
+        if end is None:
+            end = self.exit
+        # A caller-supplied graph may not match the maze, so it is never cached.
+        cacheable = self.__cache is not None and graph is None
+        if prune and graph is None:
+            graph = self.pruned_graph(start, end)
+        if self.__events is not None:
+            self.__events.clear()
+
+        key = None
+        if cacheable:
+            key = (self.fingerprint, start, end, algorithm, prune)
+            result = self.__cache.get(key)
+            if result is not None:
+                self.__nodes_expanded = 0
+                if result.path is not None:
+                    self.__record_path(result.path)
+                return result
+
+        solvers = {
+            "dfs": self._solve_dfs_iterative,
+            "bfs": self._solve_bfs,
+            "astar": self._solve_astar,
+            "dijkstra": self._solve_dijkstra,
+            "lpastar": self._solve_lpastar,
+            "hpastar": self._solve_hpastar,
+            "bibfs": self._solve_bibfs,
+            "biastar": self._solve_biastar,
+        }
+        if algorithm not in solvers:
             print(f"Unknown algorithm: {algorithm}")
-            return False
+            return SolveResult(algorithm, None)
+
+        self.__cancel = cancel
+        try:
+            with self.__phase("solve"):
+                path = solvers[algorithm](
+                    graph,
+                    start[0] * self.__num_rows + start[1],
+                    end[0] * self.__num_rows + end[1],
+                )
+        finally:
+            self.__cancel = None
+        self.__count("expansions", self.__nodes_expanded)
+        result = SolveResult(algorithm, path, self.__nodes_expanded)
+        if key is not None:
+            self.__cache.put(key, result)
+        return result
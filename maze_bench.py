@@ -0,0 +1,456 @@
+import argparse
+import heapq
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+
+from generators import GENERATORS
+from grid import WallGrid, LEFT, RIGHT, TOP, BOTTOM
+from maze import Maze
+from raster import rasterize, write_png
+from terrain import dial_shortest_path, random_terrain
+
+DEFAULT_SIZES = [250, 500, 1000, 2000, 4000]
+DEFAULT_GENERATOR_SIZES = [100, 250, 500]
+DEFAULT_WEIGHTED_SIZES = [250, 500, 1000]
+FULL_SIZES = [10, 100, 500, 1000, 2000, 4000]
+SOLVERS = ("dfs", "bfs", "astar", "bibfs", "biastar", "dijkstra", "lpastar", "hpastar")
+RENDERERS = ("headless", "canvas")
+CANVAS_MAX_SIZE = 500
+REGRESSION_THRESHOLD = 0.10
+MIN_COMPARE_SECONDS = 0.01
+
+
+def corridor_grid(num_cols, num_rows):
+    column = bytearray([LEFT | RIGHT]) * num_rows
+    column[0] |= TOP
+    column[-1] |= BOTTOM
+    cells = column * num_cols
+    for i in range(num_cols - 1):
+        j = num_rows - 1 if i % 2 == 0 else 0
+        cells[i * num_rows + j] &= ~RIGHT
+        cells[(i + 1) * num_rows + j] &= ~LEFT
+    cells[0] &= ~TOP
+    cells[-1] &= ~BOTTOM
+    return WallGrid(num_cols, num_rows, cells)
+
+
+def corridor_maze(size):
+    grid = corridor_grid(size, size)
+    return Maze(0, 0, size, size, 1, 1, storage=grid, generate=False)
+
+
+def bench_solvers(sizes, algorithms=("dfs", "bfs")):
+    results = []
+    for size in sizes:
+        maze = corridor_maze(size)
+        for algorithm in algorithms:
+            start_time = time.perf_counter()
+            solved = maze.solve(algorithm=algorithm)
+            elapsed = time.perf_counter() - start_time
+            results.append(
+                {
+                    "size": size,
+                    "algorithm": algorithm,
+                    "solved": solved,
+                    "seconds": elapsed,
+                    "ns_per_cell": elapsed * 1e9 / (size * size),
+                }
+            )
+    return results
+
+
+def bench_generators(
+    sizes,
+    generators=tuple(GENERATORS),
+    algorithms=("dfs", "bfs", "astar", "bibfs", "biastar"),
+):
+    results = []
+    for size in sizes:
+        for generator in generators:
+            start_time = time.perf_counter()
+            maze = Maze(0, 0, size, size, 1, 1, seed=size, generator=generator)
+            elapsed = time.perf_counter() - start_time
+            result = {
+                "size": size,
+                "generator": generator,
+                "seconds": elapsed,
+                "cells_per_second": size * size / elapsed,
+                "solvers": {},
+            }
+            for algorithm in algorithms:
+                start_time = time.perf_counter()
+                solved = maze.solve(algorithm=algorithm)
+                result["solvers"][algorithm] = {
+                    "seconds": time.perf_counter() - start_time,
+                    "expanded": solved.expanded,
+                    "length": solved.length,
+                }
+            results.append(result)
+    return results
+
+
+def heapq_dijkstra(graph, weights, start, end):
+    offsets = graph.offsets
+    neighbors = graph.neighbors
+    dist = array("i", [-1]) * len(graph)
+    parent = array("i", [-1]) * len(graph)
+    closed = bytearray(len(graph))
+    dist[start] = 0
+    parent[start] = start
+    heap = [(0, start)]
+    expanded = 0
+    while heap:
+        d, idx = heapq.heappop(heap)
+        if closed[idx]:
+            continue
+        closed[idx] = 1
+        expanded += 1
+        if idx == end:
+            return parent, expanded
+        for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+            if closed[n_idx]:
+                continue
+            n_dist = d + weights[n_idx]
+            if dist[n_idx] < 0 or n_dist < dist[n_idx]:
+                dist[n_idx] = n_dist
+                parent[n_idx] = idx
+                heapq.heappush(heap, (n_dist, n_idx))
+    return None, expanded
+
+
+def bench_weighted(sizes, generator="kruskal"):
+    results = []
+    for size in sizes:
+        maze = Maze(0, 0, size, size, 1, 1, seed=size, generator=generator)
+        maze.set_weights(random_terrain(size, size, random.Random(size)))
+        graph = maze.graph
+        end = len(graph) - 1
+        timings = {}
+        for name, solver in (
+            ("heapq", heapq_dijkstra),
+            ("dial", dial_shortest_path),
+        ):
+            start_time = time.perf_counter()
+            solver(graph, maze.weights, 0, end)
+            timings[name] = time.perf_counter() - start_time
+        for algorithm in ("dijkstra", "astar"):
+            start_time = time.perf_counter()
+            maze.solve(algorithm=algorithm)
+            timings[algorithm] = time.perf_counter() - start_time
+        results.append({"size": size, "seconds": timings})
+    return results
+
+
+def _measure(setup, run, memory=True):
+    subject = setup()
+    start_time = time.perf_counter()
+    value = run(subject)
+    seconds = time.perf_counter() - start_time
+    peak = None
+    if memory:
+        subject = setup()
+        tracemalloc.start()
+        try:
+            run(subject)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return value, seconds, peak
+
+
+def _clone(maze):
+    grid = maze.grid
+    storage = WallGrid(grid.num_cols, grid.num_rows, bytearray(grid.cells))
+    clone = Maze(
+        0,
+        0,
+        grid.num_rows,
+        grid.num_cols,
+        1,
+        1,
+        seed=maze.seed,
+        storage=storage,
+        generate=False,
+    )
+    clone.graph
+    return clone
+
+
+def _canvas_window():
+    try:
+        from graphics import Window
+
+        return Window(800, 600, 10, 10, 10)
+    except Exception as error:
+        return error
+
+
+def _render_canvas(win, maze, size):
+    from render import MazeRenderer
+
+    cell_size = max(1, 600 // size)
+    shown = Maze(
+        0,
+        0,
+        size,
+        size,
+        cell_size,
+        cell_size,
+        win=win,
+        seed=maze.seed,
+        storage=maze.grid,
+        generate=False,
+    )
+    win.clear_canvas()
+    MazeRenderer(win, shown).draw_maze()
+    win.redraw()
+
+
+def run_benchmarks(
+    sizes,
+    generators=tuple(GENERATORS),
+    algorithms=SOLVERS,
+    renderers=RENDERERS,
+    memory=True,
+    report=None,
+):
+    results = []
+    window = None
+
+    def add(record):
+        results.append(record)
+        if report is not None:
+            report(record)
+
+    for size in sizes:
+        for generator in generators:
+
+            def generate():
+                return Maze(0, 0, size, size, 1, 1, seed=size, generator=generator)
+
+            maze, seconds, peak = _measure(lambda: None, lambda _: generate(), memory)
+            add(
+                {
+                    "kind": "generate",
+                    "size": size,
+                    "generator": generator,
+                    "seconds": seconds,
+                    "peak_bytes": peak,
+                    "cells_per_second": size * size / seconds,
+                }
+            )
+            for algorithm in algorithms:
+                result, seconds, peak = _measure(
+                    lambda: _clone(maze),
+                    lambda subject: subject.solve(algorithm=algorithm),
+                    memory,
+                )
+                add(
+                    {
+                        "kind": "solve",
+                        "size": size,
+                        "generator": generator,
+                        "algorithm": algorithm,
+                        "seconds": seconds,
+                        "peak_bytes": peak,
+                        "expanded": result.expanded,
+                        "length": result.length,
+                    }
+                )
+            for renderer in renderers:
+                record = {
+                    "kind": "render",
+                    "size": size,
+                    "generator": generator,
+                    "renderer": renderer,
+                }
+                if renderer == "headless":
+                    _, seconds, peak = _measure(
+                        lambda: maze.grid,
+                        lambda grid: write_png(os.devnull, rasterize(grid, 4)),
+                        memory,
+                    )
+                elif size > CANVAS_MAX_SIZE:
+                    record["skipped"] = f"canvas sizes are capped at {CANVAS_MAX_SIZE}"
+                    add(record)
+                    continue
+                else:
+                    if window is None:
+                        window = _canvas_window()
+                    if isinstance(window, Exception):
+                        record["skipped"] = f"no canvas available: {window}"
+                        add(record)
+                        continue
+                    _, seconds, peak = _measure(
+                        lambda: window,
+                        lambda win: _render_canvas(win, maze, size),
+                        memory,
+                    )
+                record["seconds"] = seconds
+                record["peak_bytes"] = peak
+                add(record)
+    return results
+
+
+def result_key(record):
+    return (
+        record["kind"],
+        record["size"],
+        record.get("generator"),
+        record.get("algorithm") or record.get("renderer"),
+    )
+
+
+def compare_results(
+    baseline, current, threshold=REGRESSION_THRESHOLD, min_seconds=MIN_COMPARE_SECONDS
+):
+    previous = {result_key(record): record for record in baseline}
+    regressions = []
+    for record in current:
+        old = previous.get(result_key(record))
+        if old is None or "skipped" in old or "skipped" in record:
+            continue
+        if max(old["seconds"], record["seconds"]) >= min_seconds:
+            if record["seconds"] > old["seconds"] * (1 + threshold):
+                regressions.append((record, "seconds", old["seconds"]))
+        if old.get("peak_bytes") and record.get("peak_bytes"):
+            if record["peak_bytes"] > old["peak_bytes"] * (1 + threshold):
+                regressions.append((record, "peak_bytes", old["peak_bytes"]))
+        if "expanded" in record and record["expanded"] != old.get("expanded"):
+            regressions.append((record, "expanded", old.get("expanded")))
+    return regressions
+
+
+def _describe(record):
+    name = record.get("algorithm") or record.get("renderer") or ""
+    return (
+        f"{record['kind']:<8} {record['size']:>5}x{record['size']:<5}"
+        f" {record.get('generator', ''):<12} {name:<9}"
+    )
+
+
+def _print_record(record):
+    if "skipped" in record:
+        print(f"{_describe(record)} skipped ({record['skipped']})")
+        return
+    line = f"{_describe(record)} {record['seconds']:9.4f}s"
+    if record.get("peak_bytes") is not None:
+        line += f" {record['peak_bytes'] / 1e6:9.2f} MB"
+    if "expanded" in record:
+        line += f"  expanded {record['expanded']}"
+    print(line)
+
+
+def _load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def _split(value):
+    return [item for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maze benchmarks.")
+    parser.add_argument(
+        "--suite",
+        choices=("full", "solvers", "generators", "weighted"),
+        default="full",
+        help="full sweep, corridor solvers, generators or weighted terrain",
+    )
+    parser.add_argument("--sizes", help="comma separated square maze sizes")
+    parser.add_argument("--generators", default=",".join(GENERATORS))
+    parser.add_argument("--algorithms", default=",".join(SOLVERS))
+    parser.add_argument("--renderers", default=",".join(RENDERERS))
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip the tracemalloc pass that records peak memory",
+    )
+    parser.add_argument("--out", help="write the full sweep results as JSON")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        help="compare two JSON result files and report regressions",
+    )
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+    sizes = None
+    if args.sizes:
+        sizes = [int(size) for size in _split(args.sizes)]
+
+    if args.compare:
+        baseline, current = (_load_results(path) for path in args.compare)
+        regressions = compare_results(baseline, current, args.threshold)
+        for record, metric, old in regressions:
+            print(f"REGRESSION {_describe(record)} {metric}: {old} -> {record[metric]}")
+        print(f"{len(regressions)} regression(s) over {len(current)} results")
+        if regressions:
+            sys.exit(1)
+        return
+
+    if args.suite == "full":
+        results = run_benchmarks(
+            sizes or FULL_SIZES,
+            _split(args.generators),
+            _split(args.algorithms),
+            _split(args.renderers),
+            memory=not args.no_memory,
+            report=_print_record,
+        )
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(
+                    {
+                        "meta": {
+                            "python": platform.python_version(),
+                            "platform": platform.platform(),
+                            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        },
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                )
+            print(f"Wrote {len(results)} results to {args.out}")
+        return
+
+    if args.suite == "generators":
+        for result in bench_generators(sizes or DEFAULT_GENERATOR_SIZES):
+            solvers = " ".join(
+                f"{name}={stats['expanded']}/{stats['seconds']:.3f}s"
+                for name, stats in result["solvers"].items()
+            )
+            print(
+                f"{result['size']:>5}x{result['size']:<5} {result['generator']:<12}"
+                f" {result['cells_per_second']:12.0f} cells/s  expanded/time: {solvers}"
+            )
+        return
+
+    if args.suite == "weighted":
+        for result in bench_weighted(sizes or DEFAULT_WEIGHTED_SIZES):
+            timings = result["seconds"]
+            columns = " ".join(f"{name}={t:.3f}s" for name, t in timings.items())
+            speedup = timings["heapq"] / timings["dijkstra"]
+            print(
+                f"{result['size']:>5}x{result['size']:<5} {columns}"
+                f"  dijkstra vs heapq: {speedup:.1f}x"
+            )
+        return
+
+    for result in bench_solvers(sizes or DEFAULT_SIZES):
+        print(
+            f"{result['size']:>5}x{result['size']:<5} {result['algorithm']:<6}"
+            f" {result['seconds']:9.3f}s {result['ns_per_cell']:8.1f} ns/cell"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import tempfile
+
+from grid import WallGrid, LEFT, RIGHT, TOP, BOTTOM, CLEAR_VISITED
+
+MAGIC = b"MAZE"
+VERSION = 1
+FLAG_INT_SEED = 1
+FLAG_ROW_MAJOR = 2
+FLAG_WEIGHTS = 4
+HEADER = struct.Struct("<4sHHIIIIII8s16s8x")
+
+
+class MazeFileError(ValueError):
+    pass
+
+
+def check_seed(seed):
+    # The header stores the seed in a fixed 8-byte field.
+    if isinstance(seed, int):
+        if not -(2**63) <= seed < 2**63:
+            raise ValueError(f"seed {seed} does not fit in a signed 64-bit integer")
+    elif not isinstance(seed, float):
+        raise ValueError(f"seed must be an int or a float, not {type(seed).__name__}")
+
+
+def _pack_seed(seed):
+    if isinstance(seed, int):
+        return FLAG_INT_SEED, struct.pack("<q", seed)
+    return 0, struct.pack("<d", float(seed))
+
+
+def _unpack_seed(flags, raw):
+    if flags & FLAG_INT_SEED:
+        return struct.unpack("<q", raw)[0]
+    return struct.unpack("<d", raw)[0]
+
+
+def _pack_header(num_cols, num_rows, seed, generator, entrance, exit, flags=0):
+    if exit is None:
+        exit = (num_cols - 1, num_rows - 1)
+    seed_flags, raw_seed = _pack_seed(seed)
+    return HEADER.pack(
+        MAGIC,
+        VERSION,
+        flags | seed_flags,
+        num_cols,
+        num_rows,
+        entrance[0],
+        entrance[1],
+        exit[0],
+        exit[1],
+        raw_seed,
+        generator.encode("ascii"),
+    )
+
+
+def pack_header(grid, seed, generator="backtracker", entrance=(0, 0), exit=None):
+    flags = FLAG_WEIGHTS if grid.weights is not None else 0
+    return _pack_header(
+        grid.num_cols, grid.num_rows, seed, generator, entrance, exit, flags
+    )
+
+
+def unpack_header(data):
+    if len(data) < HEADER.size:
+        raise MazeFileError("file too short for a maze header")
+    (
+        magic,
+        version,
+        flags,
+        num_cols,
+        num_rows,
+        entrance_i,
+        entrance_j,
+        exit_i,
+        exit_j,
+        raw_seed,
+        generator,
+    ) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise MazeFileError("not a maze file")
+    if version != VERSION:
+        raise MazeFileError(f"unsupported maze file version {version}")
+    return {
+        "version": version,
+        "flags": flags,
+        "num_cols": num_cols,
+        "num_rows": num_rows,
+        "entrance": (entrance_i, entrance_j),
+        "exit": (exit_i, exit_j),
+        "seed": _unpack_seed(flags, raw_seed),
+        "generator": generator.rstrip(b"\0").decode("ascii"),
+    }
+
+
+def save_grid(path, grid, seed, generator="backtracker", entrance=(0, 0), exit=None):
+    # The grid may be memory-mapped from path itself, so write a sibling file
+    # and swap it in; truncating path would pull the pages out from under it.
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(pack_header(grid, seed, generator, entrance, exit))
+            f.write(bytes(grid.cells).translate(CLEAR_VISITED))
+            if grid.weights is not None:
+                f.write(bytes(grid.weights))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class MazeStreamWriter:
+    def __init__(self, path, num_cols, seed, generator="eller"):
+        self.num_cols = num_cols
+        self.num_rows = 0
+        self.__seed = seed
+        self.__generator = generator
+        self.__file = open(path, "wb")
+        self.__file.write(self.__header())
+
+    def __header(self):
+        return _pack_header(
+            self.num_cols,
+            self.num_rows,
+            self.__seed,
+            self.__generator,
+            (0, 0),
+            (self.num_cols - 1, max(self.num_rows - 1, 0)),
+            FLAG_ROW_MAJOR,
+        )
+
+    def write_row(self, row):
+        if len(row) != self.num_cols:
+            raise ValueError(f"expected {self.num_cols} cells, got {len(row)}")
+        self.__file.write(bytes(row).translate(CLEAR_VISITED))
+        self.num_rows += 1
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.seek(0)
+            self.__file.write(self.__header())
+            self.__file.close()
+            self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_rows(path, num_cols, rows, seed, generator="eller"):
+    with MazeStreamWriter(path, num_cols, seed, generator) as writer:
+        for row in rows:
+            writer.write_row(row)
+        return writer.num_rows
+
+
+def iter_rows(path):
+    with open(path, "rb") as f:
+        header = unpack_header(f.read(HEADER.size))
+        num_cols = header["num_cols"]
+        num_rows = header["num_rows"]
+        if header["flags"] & FLAG_ROW_MAJOR:
+            for _ in range(num_rows):
+                row = f.read(num_cols)
+                if len(row) < num_cols:
+                    raise MazeFileError("maze file is truncated")
+                yield bytearray(row)
+            return
+    grid, _ = open_grid(path)
+    for j in range(num_rows):
+        yield bytearray(grid.cells[j::num_rows])
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        return unpack_header(f.read(HEADER.size))
+
+
+def open_grid(path):
+    with open(path, "rb") as f:
+        header = unpack_header(f.read(HEADER.size))
+        size = header["num_cols"] * header["num_rows"]
+        if size == 0:
+            return WallGrid(header["num_cols"], header["num_rows"]), header
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    weighted = header["flags"] & FLAG_WEIGHTS
+    if len(mapped) < HEADER.size + size * (2 if weighted else 1):
+        raise MazeFileError("maze file is truncated")
+    cells = memoryview(mapped)[HEADER.size : HEADER.size + size]
+    weights = None
+    if weighted:
+        weights = memoryview(mapped)[HEADER.size + size : HEADER.size + 2 * size]
+    if header["flags"] & FLAG_ROW_MAJOR:
+        num_cols = header["num_cols"]
+        num_rows = header["num_rows"]
+        data = bytes(cells)
+        cells = bytearray(size)
+        if num_cols <= num_rows:
+            for i in range(num_cols):
+                cells[i * num_rows : (i + 1) * num_rows] = data[i::num_cols]
+        else:
+            for j in range(num_rows):
+                cells[j::num_rows] = data[j * num_cols : (j + 1) * num_cols]
+    grid = WallGrid(header["num_cols"], header["num_rows"], cells, weights)
+    return grid, header
+
+
+def to_ascii(grid):
+    rows = grid.num_rows
+    cells = grid.cells
+    lines = []
+    for j in range(rows):
+        top = ["+"]
+        middle = []
+        for i in range(grid.num_cols):
+            walls = cells[i * rows + j]
+            top.append("--+" if walls & TOP else "  +")
+            middle.append("|  " if walls & LEFT else "   ")
+        walls = cells[(grid.num_cols - 1) * rows + j]
+        middle.append("|" if walls & RIGHT else " ")
+        lines.append("".join(top))
+        lines.append("".join(middle))
+    bottom = ["+"]
+    for i in range(grid.num_cols):
+        walls = cells[i * rows + rows - 1]
+        bottom.append("--+" if walls & BOTTOM else "  +")
+    lines.append("".join(bottom))
+    return "\n".join(lines) + "\n"
+
+
+def from_ascii(text):
+    lines = text.splitlines()
+    num_rows = (len(lines) - 1) // 2
+    num_cols = (len(lines[0]) - 1) // 3
+    if num_rows < 1 or num_cols < 1:
+        raise MazeFileError("not an ASCII maze")
+    grid = WallGrid(num_cols, num_rows)
+    for i in range(num_cols):
+        for j in range(num_rows):
+            walls = 0
+            if lines[2 * j][3 * i + 1] == "-":
+                walls |= TOP
+            if lines[2 * j + 2][3 * i + 1] == "-":
+                walls |= BOTTOM
+            if lines[2 * j + 1][3 * i] == "|":
+                walls |= LEFT
+            if lines[2 * j + 1][3 * i + 3 : 3 * i + 4] == "|":
+                walls |= RIGHT
+            grid.cells[i * num_rows + j] = walls
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and convert maze files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="print the header of a .maze file")
+    info.add_argument("path")
+    convert = commands.add_parser(
+        "convert", help="convert between .maze and ASCII .txt files"
+    )
+    convert.add_argument("source")
+    convert.add_argument("target")
+    convert.add_argument("--seed", type=int, default=0)
+    stream = commands.add_parser(
+        "stream", help="stream a tall Eller maze row by row to .maze or .png"
+    )
+    stream.add_argument("target")
+    stream.add_argument("--cols", type=int, default=100)
+    stream.add_argument("--rows", type=int, default=10000)
+    stream.add_argument("--seed", type=int, default=0)
+    stream.add_argument("--cell-size", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        header = read_header(args.path)
+        for key, value in header.items():
+            print(f"{key}: {value}")
+    elif args.command == "stream":
+        from generators import eller_rows, open_ends
+
+        rows = open_ends(eller_rows(args.cols, random.Random(args.seed), args.rows))
+        if args.target.endswith(".png"):
+            from raster import write_png_rows
+
+            count = write_png_rows(args.target, args.cols, rows, args.cell_size)
+        else:
+            count = write_rows(args.target, args.cols, rows, args.seed)
+        print(f"Wrote {count} rows to {args.target}")
+    elif args.source.endswith(".txt"):
+        with open(args.source) as f:
+            grid = from_ascii(f.read())
+        save_grid(args.target, grid, args.seed)
+    else:
+        grid, _ = open_grid(args.source)
+        with open(args.target, "w") as f:
+            f.write(to_ascii(grid))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from graph import build_graph
+from grid import WallGrid
+
+_worker_graph = None
+
+
+def group_by_source(pairs):
+    groups = {}
+    for start, end in pairs:
+        groups.setdefault(start, []).append(end)
+    return list(groups.items())
+
+
+def search_from(graph, source, goals):
+    offsets = graph.offsets
+    neighbors = graph.neighbors
+    parent = array("i", [-1]) * len(graph)
+    parent[source] = source
+    pending = set(goals)
+    found = {}
+    q = deque()
+    q.append(source)
+    expanded = 0
+
+    while q and pending:
+        idx = q.popleft()
+        expanded += 1
+        if idx in pending:
+            pending.discard(idx)
+            found[idx] = expanded
+        for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+            if parent[n_idx] < 0:
+                parent[n_idx] = idx
+                q.append(n_idx)
+
+    results = []
+    for goal in goals:
+        if goal not in found:
+            results.append((goal, None, expanded))
+            continue
+        path = [goal]
+        idx = goal
+        while idx != source:
+            idx = parent[idx]
+            path.append(idx)
+        path.reverse()
+        results.append((goal, path, found[goal]))
+    return source, results
+
+
+def _init_worker(cells, num_cols, num_rows):
+    global _worker_graph
+    _worker_graph = build_graph(WallGrid(num_cols, num_rows, cells))
+
+
+def _search_task(group):
+    source, goals = group
+    return search_from(_worker_graph, source, goals)
+
+
+def solve_pairs(graph, grid, pairs, workers=1):
+    groups = group_by_source(pairs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(groups) <= 1:
+        for source, goals in groups:
+            yield search_from(graph, source, goals)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(bytes(grid.cells), grid.num_cols, grid.num_rows),
+    ) as executor:
+        yield from executor.map(_search_task, groups)
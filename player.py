@@ -0,0 +1,69 @@
+from events import CARVE, VISIT, BACKTRACK, PATH
+from graphics import SOLVE_PATH_COLOR, UNDO_PATH_COLOR
+from render import MazeRenderer
+
+
+class EventPlayer:
+    def __init__(self, win, maze, log, fps=60, steps_per_frame=2, on_done=None):
+        self.__win = win
+        self.__renderer = MazeRenderer(win, maze)
+        self.__log = log
+        self.__delay = max(1, 1000 // fps)
+        self.__steps_per_frame = steps_per_frame
+        self.__on_done = on_done
+        self.__pos = 0
+        self.__from_blank = False
+        self.__in_path = False
+        self.__job = None
+
+    @property
+    def playing(self):
+        return self.__job is not None
+
+    def play(self, from_blank=False):
+        self.stop()
+        self.__pos = 0
+        self.__from_blank = from_blank
+        self.__in_path = False
+        if from_blank:
+            self.__win.clear_canvas()
+            self.__renderer.draw_blank_grid()
+        else:
+            self.__renderer.clear_path()
+        self.__job = self.__win.schedule(self.__delay, self.__frame)
+
+    def stop(self):
+        if self.__job is not None:
+            self.__win.cancel(self.__job)
+            self.__job = None
+            # Later replays only clear the path tag, so leave a full wall layer.
+            if self.__from_blank:
+                self.__renderer.draw_maze()
+
+    def __frame(self):
+        end = min(self.__pos + self.__steps_per_frame, len(self.__log))
+        with self.__renderer.phase():
+            for k in range(self.__pos, end):
+                self.__apply(*self.__log[k])
+        self.__pos = end
+        if self.__pos < len(self.__log):
+            self.__job = self.__win.schedule(self.__delay, self.__frame)
+            return
+        self.__job = None
+        if self.__from_blank:
+            self.__renderer.draw_maze()
+        if self.__on_done is not None:
+            self.__on_done()
+
+    def __apply(self, op, i, j, ni, nj):
+        if op == CARVE:
+            self.__renderer.erase_wall(i, j, ni, nj)
+        elif op == VISIT:
+            self.__renderer.draw_move(i, j, ni, nj, SOLVE_PATH_COLOR)
+        elif op == BACKTRACK:
+            self.__renderer.draw_move(i, j, ni, nj, UNDO_PATH_COLOR)
+        elif op == PATH:
+            if not self.__in_path:
+                self.__in_path = True
+                self.__renderer.clear_path()
+            self.__renderer.draw_move(i, j, ni, nj, SOLVE_PATH_COLOR)
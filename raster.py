@@ -0,0 +1,500 @@
+import argparse
+import struct
+import zlib
+
+from events import CARVE, VISIT, BACKTRACK, PATH
+from graphics import (
+    DARK_BACKGROUND,
+    LIGHT_FOREGROUND,
+    SOLVE_PATH_COLOR,
+    UNDO_PATH_COLOR,
+)
+from grid import LEFT, RIGHT, TOP, BOTTOM
+
+BACKGROUND = 0
+WALL = 1
+SOLVE = 2
+UNDO = 3
+
+
+def _rgb(color):
+    return bytes.fromhex(color.lstrip("#"))
+
+
+PALETTE = [
+    _rgb(DARK_BACKGROUND),
+    _rgb(LIGHT_FOREGROUND),
+    _rgb(SOLVE_PATH_COLOR),
+    _rgb(UNDO_PATH_COLOR),
+]
+
+
+_WALL_TABLES = {
+    side: bytes(WALL if b & side else BACKGROUND for b in range(256))
+    for side in (LEFT, RIGHT, TOP, BOTTOM)
+}
+
+
+def _or(a, b):
+    return (int.from_bytes(a, "little") | int.from_bytes(b, "little")).to_bytes(
+        len(a), "little"
+    )
+
+
+def _wall_line(mask, size):
+    line = bytearray(len(mask) * size + 1)
+    for k in range(size):
+        line[k : len(mask) * size : size] = mask
+    line[size::size] = _or(line[size::size], mask)
+    return line
+
+
+class Raster:
+    def __init__(self, num_cols, num_rows, cell_size=4):
+        if cell_size < 3:
+            raise ValueError("cell_size must be at least 3 pixels")
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.cell_size = cell_size
+        self.width = num_cols * cell_size + 1
+        self.height = num_rows * cell_size + 1
+        self.pixels = bytearray(self.width * self.height)
+        self.dirty = None
+
+    def __mark(self, x1, y1, x2, y2):
+        if self.dirty is None:
+            self.dirty = [x1, y1, x2, y2]
+        else:
+            dirty = self.dirty
+            dirty[0] = min(dirty[0], x1)
+            dirty[1] = min(dirty[1], y1)
+            dirty[2] = max(dirty[2], x2)
+            dirty[3] = max(dirty[3], y2)
+
+    def hline(self, x1, x2, y, color):
+        start = y * self.width + x1
+        self.pixels[start : start + x2 - x1 + 1] = bytes([color]) * (x2 - x1 + 1)
+        self.__mark(x1, y, x2, y)
+
+    def vline(self, x, y1, y2, color):
+        start = y1 * self.width + x
+        stop = y2 * self.width + x + 1
+        self.pixels[start : stop : self.width] = bytes([color]) * (y2 - y1 + 1)
+        self.__mark(x, y1, x, y2)
+
+    def fill(self, color):
+        self.pixels[:] = bytes([color]) * len(self.pixels)
+        self.__mark(0, 0, self.width - 1, self.height - 1)
+
+    def draw_walls(self, grid):
+        size = self.cell_size
+        rows = grid.num_rows
+        cols = grid.num_cols
+        width = self.width
+        cells = bytes(grid.cells)
+        for j in range(rows + 1):
+            if j < rows:
+                mask = cells[j::rows].translate(_WALL_TABLES[TOP])
+            else:
+                mask = cells[rows - 1 :: rows].translate(_WALL_TABLES[BOTTOM])
+            start = j * size * width
+            self.pixels[start : start + width] = _or(
+                self.pixels[start : start + width], _wall_line(mask, size)
+            )
+        for i in range(cols + 1):
+            if i < cols:
+                mask = cells[i * rows : (i + 1) * rows].translate(_WALL_TABLES[LEFT])
+            else:
+                mask = cells[(cols - 1) * rows :].translate(_WALL_TABLES[RIGHT])
+            x = i * size
+            self.pixels[x::width] = _or(self.pixels[x::width], _wall_line(mask, size))
+        self.__mark(0, 0, self.width - 1, self.height - 1)
+
+    def draw_blank_grid(self):
+        size = self.cell_size
+        for i in range(self.num_cols + 1):
+            self.vline(i * size, 0, self.height - 1, WALL)
+        for j in range(self.num_rows + 1):
+            self.hline(0, self.width - 1, j * size, WALL)
+
+    def erase_wall(self, i, j, ni, nj):
+        size = self.cell_size
+        x = i * size
+        y = j * size
+        if ni > i:
+            self.vline(x + size, y + 1, y + size - 1, BACKGROUND)
+        elif ni < i:
+            self.vline(x, y + 1, y + size - 1, BACKGROUND)
+        elif nj > j:
+            self.hline(x + 1, x + size - 1, y + size, BACKGROUND)
+        else:
+            self.hline(x + 1, x + size - 1, y, BACKGROUND)
+
+    def draw_move(self, i, j, ni, nj, color):
+        half = self.cell_size // 2
+        x1 = i * self.cell_size + half
+        y1 = j * self.cell_size + half
+        x2 = ni * self.cell_size + half
+        y2 = nj * self.cell_size + half
+        if y1 == y2:
+            self.hline(min(x1, x2), max(x1, x2), y1, color)
+        else:
+            self.vline(x1, min(y1, y2), max(y1, y2), color)
+
+    def draw_path(self, path, color=SOLVE):
+        for k in range(len(path) - 1):
+            self.draw_move(*path[k], *path[k + 1], color)
+
+    def apply(self, op, i, j, ni, nj):
+        if op == CARVE:
+            self.erase_wall(i, j, ni, nj)
+        elif op == VISIT or op == PATH:
+            self.draw_move(i, j, ni, nj, SOLVE)
+        elif op == BACKTRACK:
+            self.draw_move(i, j, ni, nj, UNDO)
+
+    def take_dirty(self):
+        dirty = self.dirty
+        self.dirty = None
+        return dirty
+
+    def crop(self, x1, y1, x2, y2):
+        out = bytearray()
+        for y in range(y1, y2 + 1):
+            start = y * self.width
+            out += self.pixels[start + x1 : start + x2 + 1]
+        return out
+
+
+def rasterize(grid, cell_size=4, path=None):
+    raster = Raster(grid.num_cols, grid.num_rows, cell_size)
+    raster.draw_walls(grid)
+    if path is not None:
+        raster.draw_path(path)
+    return raster
+
+
+def _png_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def write_png(path, raster, rows_per_chunk=256):
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        _png_chunk(
+            f,
+            b"IHDR",
+            struct.pack(">IIBBBBB", raster.width, raster.height, 8, 3, 0, 0, 0),
+        )
+        _png_chunk(f, b"PLTE", b"".join(PALETTE))
+        compressor = zlib.compressobj()
+        pending = bytearray()
+        for y in range(raster.height):
+            start = y * raster.width
+            pending += b"\0"
+            pending += raster.pixels[start : start + raster.width]
+            if (y + 1) % rows_per_chunk == 0:
+                data = compressor.compress(bytes(pending))
+                pending.clear()
+                if data:
+                    _png_chunk(f, b"IDAT", data)
+        data = compressor.compress(bytes(pending)) + compressor.flush()
+        _png_chunk(f, b"IDAT", data)
+        _png_chunk(f, b"IEND", b"")
+
+
+class PngStreamWriter:
+    def __init__(self, path, num_cols, cell_size=4, rows_per_chunk=256):
+        if cell_size < 3:
+            raise ValueError("cell_size must be at least 3 pixels")
+        self.num_cols = num_cols
+        self.num_rows = 0
+        self.cell_size = cell_size
+        self.width = num_cols * cell_size + 1
+        self.__rows_per_chunk = rows_per_chunk
+        self.__compressor = zlib.compressobj()
+        self.__pending = bytearray()
+        self.__lines = 0
+        self.__previous = None
+        self.__file = open(path, "wb")
+        self.__file.write(b"\x89PNG\r\n\x1a\n")
+        self.__ihdr = self.__file.tell()
+        self.__write_ihdr(0)
+        _png_chunk(self.__file, b"PLTE", b"".join(PALETTE))
+
+    def __write_ihdr(self, height):
+        data = struct.pack(">IIBBBBB", self.width, height, 8, 3, 0, 0, 0)
+        _png_chunk(self.__file, b"IHDR", data)
+
+    def __verticals(self, row):
+        mask = bytearray(row.translate(_WALL_TABLES[LEFT]))
+        mask += bytes(row[-1:]).translate(_WALL_TABLES[RIGHT])
+        return mask
+
+    def __emit(self, line):
+        self.__pending += b"\0"
+        self.__pending += line
+        self.__lines += 1
+        if self.__lines % self.__rows_per_chunk == 0:
+            data = self.__compressor.compress(bytes(self.__pending))
+            self.__pending.clear()
+            if data:
+                _png_chunk(self.__file, b"IDAT", data)
+
+    def write_row(self, row):
+        row = bytes(row)
+        if len(row) != self.num_cols:
+            raise ValueError(f"expected {self.num_cols} cells, got {len(row)}")
+        size = self.cell_size
+        verticals = self.__verticals(row)
+        top = _wall_line(row.translate(_WALL_TABLES[TOP]), size)
+        top[::size] = _or(top[::size], verticals)
+        if self.__previous is not None:
+            top[::size] = _or(top[::size], self.__verticals(self.__previous))
+        self.__emit(top)
+        inner = bytearray(self.width)
+        inner[::size] = verticals
+        for _ in range(size - 1):
+            self.__emit(inner)
+        self.__previous = row
+        self.num_rows += 1
+
+    def close(self):
+        if self.__file is None:
+            return
+        if self.__previous is not None:
+            size = self.cell_size
+            bottom = _wall_line(self.__previous.translate(_WALL_TABLES[BOTTOM]), size)
+            bottom[::size] = _or(bottom[::size], self.__verticals(self.__previous))
+            self.__emit(bottom)
+        f = self.__file
+        data = self.__compressor.compress(bytes(self.__pending))
+        data += self.__compressor.flush()
+        _png_chunk(f, b"IDAT", data)
+        _png_chunk(f, b"IEND", b"")
+        f.seek(self.__ihdr)
+        self.__write_ihdr(self.__lines)
+        f.close()
+        self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_png_rows(path, num_cols, rows, cell_size=4):
+    with PngStreamWriter(path, num_cols, cell_size) as png:
+        for row in rows:
+            png.write_row(row)
+        return png.num_rows
+
+
+def write_ppm(path, raster):
+    pixels = bytes(raster.pixels)
+    rgb = bytearray(len(pixels) * 3)
+    for channel in range(3):
+        table = bytearray(256)
+        for index, color in enumerate(PALETTE):
+            table[index] = color[channel]
+        rgb[channel::3] = pixels.translate(bytes(table))
+    with open(path, "wb") as f:
+        f.write(f"P6\n{raster.width} {raster.height}\n255\n".encode("ascii"))
+        f.write(rgb)
+
+
+def _lzw_encode(pixels, min_code_size):
+    clear = 1 << min_code_size
+    end = clear + 1
+    out = bytearray()
+    bit_buffer = 0
+    bit_count = 0
+
+    def emit(code, size):
+        nonlocal bit_buffer, bit_count
+        bit_buffer |= code << bit_count
+        bit_count += size
+        while bit_count >= 8:
+            out.append(bit_buffer & 0xFF)
+            bit_buffer >>= 8
+            bit_count -= 8
+
+    code_size = min_code_size + 1
+    table = {}
+    next_code = end + 1
+    emit(clear, code_size)
+    prefix = -1
+    for pixel in pixels:
+        if prefix < 0:
+            prefix = pixel
+            continue
+        key = (prefix << 8) | pixel
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        emit(prefix, code_size)
+        if next_code < 4096:
+            table[key] = next_code
+            if next_code == 1 << code_size and code_size < 12:
+                code_size += 1
+            next_code += 1
+        else:
+            emit(clear, code_size)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = pixel
+    if prefix >= 0:
+        emit(prefix, code_size)
+    emit(end, code_size)
+    if bit_count:
+        out.append(bit_buffer & 0xFF)
+    return out
+
+
+class GifWriter:
+    def __init__(self, path, width, height, delay_cs=2, loop=0):
+        self.width = width
+        self.height = height
+        self.delay_cs = delay_cs
+        self.frames = 0
+        self.__file = open(path, "wb")
+        f = self.__file
+        f.write(b"GIF89a")
+        f.write(struct.pack("<HHBBB", width, height, 0xF1, 0, 0))
+        f.write(b"".join(PALETTE))
+        f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01")
+        f.write(struct.pack("<H", loop))
+        f.write(b"\0")
+
+    def add_frame(self, pixels, x=0, y=0, width=None, height=None, delay_cs=None):
+        if width is None:
+            width = self.width
+        if height is None:
+            height = self.height
+        if delay_cs is None:
+            delay_cs = self.delay_cs
+        f = self.__file
+        f.write(b"\x21\xf9\x04\x04")
+        f.write(struct.pack("<H", delay_cs))
+        f.write(b"\0\0")
+        f.write(b"\x2c")
+        f.write(struct.pack("<HHHHB", x, y, width, height, 0))
+        f.write(b"\x02")
+        data = _lzw_encode(pixels, 2)
+        for start in range(0, len(data), 255):
+            block = data[start : start + 255]
+            f.write(bytes([len(block)]))
+            f.write(block)
+        f.write(b"\0")
+        self.frames += 1
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.write(b"\x3b")
+            self.__file.close()
+            self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_gif(path, raster):
+    with GifWriter(path, raster.width, raster.height) as gif:
+        gif.add_frame(raster.pixels)
+
+
+def write_animation(
+    path, grid, log, cell_size=4, events_per_frame=1, delay_cs=2, from_blank=False
+):
+    raster = Raster(grid.num_cols, grid.num_rows, cell_size)
+    if from_blank:
+        raster.draw_blank_grid()
+    else:
+        raster.draw_walls(grid)
+    base = None
+    with GifWriter(path, raster.width, raster.height, delay_cs) as gif:
+        gif.add_frame(raster.pixels)
+        raster.take_dirty()
+        in_path = False
+        for k, event in enumerate(log):
+            if event[0] == PATH and not in_path:
+                in_path = True
+                if base is None:
+                    base = Raster(grid.num_cols, grid.num_rows, cell_size)
+                    base.draw_walls(grid)
+                raster.pixels[:] = base.pixels
+                raster.take_dirty()
+                gif.add_frame(raster.pixels)
+            raster.apply(*event)
+            if (k + 1) % events_per_frame == 0:
+                dirty = raster.take_dirty()
+                if dirty is not None:
+                    x1, y1, x2, y2 = dirty
+                    gif.add_frame(
+                        raster.crop(x1, y1, x2, y2), x1, y1, x2 - x1 + 1, y2 - y1 + 1
+                    )
+        dirty = raster.take_dirty()
+        if dirty is not None:
+            x1, y1, x2, y2 = dirty
+            gif.add_frame(raster.crop(x1, y1, x2, y2), x1, y1, x2 - x1 + 1, y2 - y1 + 1)
+        return gif.frames
+
+
+WRITERS = {
+    "png": write_png,
+    "ppm": write_ppm,
+    "gif": write_gif,
+}
+
+
+def main(argv=None):
+    from maze import Maze
+
+    parser = argparse.ArgumentParser(description="Render a maze file to an image.")
+    parser.add_argument("maze", help="path to a .maze file")
+    parser.add_argument("output", help="output .png, .ppm or .gif file")
+    parser.add_argument("--cell-size", type=int, default=4)
+    parser.add_argument(
+        "--solve", default=None, help="draw the path found by this algorithm"
+    )
+    parser.add_argument(
+        "--animate",
+        action="store_true",
+        help="write an animated GIF that replays the solver steps",
+    )
+    parser.add_argument("--events-per-frame", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    maze = Maze.load(args.maze, record_events=args.animate)
+    if args.animate:
+        maze.solve(args.solve or "bfs")
+        frames = write_animation(
+            args.output,
+            maze.grid,
+            maze.events,
+            args.cell_size,
+            args.events_per_frame,
+        )
+        print(f"Wrote {frames} frames to {args.output}")
+        return
+    path = None
+    if args.solve:
+        path = maze.solve(args.solve).path
+    raster = rasterize(maze.grid, args.cell_size, path)
+    extension = args.output.rsplit(".", 1)[-1].lower()
+    if extension not in WRITERS:
+        parser.error(f"unsupported output format: {extension}")
+    WRITERS[extension](args.output, raster)
+
+
+if __name__ == "__main__":
+    main()
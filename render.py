@@ -0,0 +1,144 @@
+from contextlib import nullcontext
+
+from graphics import (
+    Line,
+    Point,
+    LIGHT_FOREGROUND,
+    DARK_BACKGROUND,
+)
+from grid import LEFT, RIGHT, TOP, BOTTOM
+
+MAZE_TAG = "maze"
+PATH_TAG = "path"
+
+
+def wall_segments(grid):
+    cols = grid.num_cols
+    rows = grid.num_rows
+    cells = grid.cells
+    adjacency = {}
+
+    def link(p1, p2):
+        adjacency.setdefault(p1, []).append(p2)
+        adjacency.setdefault(p2, []).append(p1)
+
+    for x in range(cols):
+        for y in range(rows):
+            walls = cells[x * rows + y]
+            if walls & TOP:
+                link((x, y), (x + 1, y))
+            if walls & LEFT:
+                link((x, y), (x, y + 1))
+            if y == rows - 1 and walls & BOTTOM:
+                link((x, y + 1), (x + 1, y + 1))
+            if x == cols - 1 and walls & RIGHT:
+                link((x + 1, y), (x + 1, y + 1))
+    return adjacency
+
+
+def wall_polylines(grid):
+    # Split the walls into trails that never share a segment. Starting every
+    # trail at an odd-degree corner first keeps the count near its minimum of
+    # half the odd corners, and each trail goes straight on where it can.
+    adjacency = wall_segments(grid)
+    remaining = {point: set(neighbors) for point, neighbors in adjacency.items()}
+    origins = [p for p, neighbors in adjacency.items() if len(neighbors) % 2]
+    origins.extend(p for p, neighbors in adjacency.items() if not len(neighbors) % 2)
+    polylines = []
+    for origin in origins:
+        while remaining[origin]:
+            points = [origin]
+            point = origin
+            step = None
+            while remaining[point]:
+                ahead = None
+                if step is not None:
+                    ahead = (point[0] + step[0], point[1] + step[1])
+                if ahead in remaining[point]:
+                    points[-1] = ahead
+                else:
+                    ahead = min(remaining[point])
+                    step = (ahead[0] - point[0], ahead[1] - point[1])
+                    points.append(ahead)
+                remaining[point].discard(ahead)
+                remaining[ahead].discard(point)
+                point = ahead
+            polylines.append(points)
+    return polylines
+
+
+_NO_PHASE = nullcontext()
+
+
+class MazeRenderer:
+    def __init__(self, win, maze):
+        self.__win = win
+        self.__maze = maze
+        self.__stats = maze.stats
+
+    def phase(self):
+        if self.__stats is None:
+            return _NO_PHASE
+        return self.__stats.phase("draw")
+
+    def __count(self, amount=1):
+        if self.__stats is not None:
+            self.__stats.count("canvas_items", amount)
+
+    def __point(self, x, y):
+        x1, y1, _, _ = self.__maze.cell_bounds(x, y)
+        return Point(x1, y1)
+
+    def draw_maze(self):
+        with self.phase():
+            self.__win.delete_tag(MAZE_TAG)
+            polylines = wall_polylines(self.__maze.grid)
+            for polyline in polylines:
+                points = [self.__point(x, y) for x, y in polyline]
+                self.__win.draw_polyline(points, LIGHT_FOREGROUND, MAZE_TAG)
+        self.__count(len(polylines))
+
+    def draw_blank_grid(self):
+        cols = self.__maze.num_cols
+        rows = self.__maze.num_rows
+        with self.phase():
+            self.__win.delete_tag(MAZE_TAG)
+            for x in range(cols + 1):
+                line = Line(self.__point(x, 0), self.__point(x, rows))
+                self.__win.draw_line(line, LIGHT_FOREGROUND, MAZE_TAG)
+            for y in range(rows + 1):
+                line = Line(self.__point(0, y), self.__point(cols, y))
+                self.__win.draw_line(line, LIGHT_FOREGROUND, MAZE_TAG)
+        self.__count(cols + rows + 2)
+
+    def __wall_line(self, i, j, ni, nj):
+        if ni > i:
+            return Line(self.__point(i + 1, j), self.__point(i + 1, j + 1))
+        if ni < i:
+            return Line(self.__point(i, j), self.__point(i, j + 1))
+        if nj > j:
+            return Line(self.__point(i, j + 1), self.__point(i + 1, j + 1))
+        return Line(self.__point(i, j), self.__point(i + 1, j))
+
+    def draw_wall(self, i, j, ni, nj):
+        line = self.__wall_line(i, j, ni, nj)
+        self.__win.draw_line(line, LIGHT_FOREGROUND, MAZE_TAG)
+        self.__count()
+
+    def erase_wall(self, i, j, ni, nj):
+        line = self.__wall_line(i, j, ni, nj)
+        self.__win.draw_line(line, DARK_BACKGROUND, MAZE_TAG)
+        self.__count()
+
+    def draw_move(self, i, j, ni, nj, fill_color):
+        x1, y1, x2, y2 = self.__maze.cell_bounds(i, j)
+        nx1, ny1, nx2, ny2 = self.__maze.cell_bounds(ni, nj)
+        line = Line(
+            Point((x1 + x2) // 2, (y1 + y2) // 2),
+            Point((nx1 + nx2) // 2, (ny1 + ny2) // 2),
+        )
+        self.__win.draw_line(line, fill_color, PATH_TAG)
+        self.__count()
+
+    def clear_path(self):
+        self.__win.delete_tag(PATH_TAG)
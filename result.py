@@ -0,0 +1,21 @@
+class SolveResult:
+    def __init__(self, algorithm, path, expanded=0, cached=False):
+        self.algorithm = algorithm
+        self.path = path
+        self.expanded = expanded
+        self.cached = cached
+
+    def __bool__(self):
+        return self.path is not None
+
+    def __repr__(self):
+        return (
+            f"SolveResult(algorithm={self.algorithm!r}, length={self.length}, "
+            f"expanded={self.expanded}, cached={self.cached})"
+        )
+
+    @property
+    def length(self):
+        if self.path is None:
+            return None
+        return len(self.path) - 1
@@ -0,0 +1,436 @@
+import argparse
+import asyncio
+import json
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from cache import SolveCache
+from generators import GENERATORS
+from grid import WallGrid
+from maze import Maze
+from result import SolveResult
+
+ALGORITHMS = ("dfs", "bfs", "astar", "bibfs", "biastar", "dijkstra", "lca")
+BATCHED_ALGORITHMS = ("bfs", "lca")
+MAX_SIDE = 4000
+MAX_BODY = 64 * 1024
+STREAM_THRESHOLD = 4096
+CHUNK_POINTS = 2048
+WORKER_MAZES = 8
+MISSING = "missing"
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+_worker_mazes = OrderedDict()
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _generate_task(num_rows, num_cols, seed, generator):
+    maze = Maze(0, 0, num_rows, num_cols, 1, 1, seed=seed, generator=generator)
+    return maze.fingerprint, bytes(maze.grid.cells)
+
+
+def _solve_task(fingerprint, algorithm, pairs, entry=None):
+    # Each worker keeps its own small LRU of rebuilt mazes. The wall bytes
+    # are only shipped when the worker reports that it does not have them.
+    maze = _worker_mazes.get(fingerprint)
+    if maze is None:
+        if entry is None:
+            return MISSING
+        num_cols, num_rows, seed, cells = entry
+        grid = WallGrid(num_cols, num_rows, bytearray(cells))
+        maze = Maze(
+            0, 0, num_rows, num_cols, 1, 1, seed=seed, storage=grid, generate=False
+        )
+        _worker_mazes[fingerprint] = maze
+        while len(_worker_mazes) > WORKER_MAZES:
+            _worker_mazes.popitem(last=False)
+    else:
+        _worker_mazes.move_to_end(fingerprint)
+
+    if algorithm in BATCHED_ALGORITHMS:
+        results = maze.solve_many(pairs, algorithm)
+    else:
+        results = (
+            (start, end, maze.solve(algorithm, start=start, end=end))
+            for start, end in pairs
+        )
+    return [(start, end, r.path, r.expanded) for start, end, r in results]
+
+
+def _point(value, num_cols, num_rows):
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise HttpError(400, f"bad cell: {value!r}")
+    if not all(isinstance(v, int) and not isinstance(v, bool) for v in value):
+        raise HttpError(400, f"bad cell: {value!r}")
+    i, j = value
+    if not (0 <= i < num_cols and 0 <= j < num_rows):
+        raise HttpError(400, f"cell {[i, j]} is outside the maze")
+    return i, j
+
+
+def _query_point(text):
+    try:
+        return [int(v) for v in text.split(",")]
+    except ValueError:
+        raise HttpError(400, f"bad cell: {text!r}")
+
+
+def _head(status, headers):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _chunk(data):
+    return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+class MazeServer:
+    def __init__(
+        self,
+        max_mazes=16,
+        workers=None,
+        batch_window=0.002,
+        cache_entries=4096,
+        stream_threshold=STREAM_THRESHOLD,
+    ):
+        self.max_mazes = max_mazes
+        self.batch_window = batch_window
+        self.stream_threshold = stream_threshold
+        self.counters = {
+            "requests": 0,
+            "searches": 0,
+            "batches": 0,
+            "coalesced": 0,
+            "evicted": 0,
+        }
+        self.__mazes = OrderedDict()
+        self.__cache = SolveCache(max_entries=cache_entries)
+        self.__inflight = {}
+        self.__batches = {}
+        if workers == 0:
+            # Worker mazes are shared module state, so in-process solving
+            # must stay on a single thread.
+            self.__executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.__executor = ProcessPoolExecutor(max_workers=workers)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        return await asyncio.start_server(self.__handle, host, port)
+
+    def close(self):
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __run(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self.__executor, func, *args)
+
+    def __maze(self, fingerprint):
+        if not isinstance(fingerprint, str):
+            raise HttpError(400, f"maze id must be a string, got {fingerprint!r}")
+        entry = self.__mazes.get(fingerprint)
+        if entry is None:
+            raise HttpError(404, f"unknown maze {fingerprint!r}")
+        self.__mazes.move_to_end(fingerprint)
+        return entry
+
+    def __coalesce(self, key, start):
+        future = self.__inflight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return future
+        future = self.__inflight[key] = start()
+        future.add_done_callback(lambda _: self.__inflight.pop(key, None))
+        return future
+
+    async def generate(self, num_rows, num_cols, seed=None, generator="backtracker"):
+        if not (1 <= num_rows <= MAX_SIDE and 1 <= num_cols <= MAX_SIDE):
+            raise HttpError(400, f"rows and cols must be between 1 and {MAX_SIDE}")
+        if generator not in GENERATORS:
+            raise HttpError(400, f"unknown generator {generator!r}")
+        if seed is None:
+            seed = random.randrange(2**63)
+
+        async def build():
+            fingerprint, cells = await self.__run(
+                _generate_task, num_rows, num_cols, seed, generator
+            )
+            self.__mazes[fingerprint] = {
+                "id": fingerprint,
+                "rows": num_rows,
+                "cols": num_cols,
+                "seed": seed,
+                "generator": generator,
+                "cells": cells,
+            }
+            while len(self.__mazes) > self.max_mazes:
+                self.__mazes.popitem(last=False)
+                self.counters["evicted"] += 1
+            return self.__mazes[fingerprint]
+
+        key = ("generate", num_rows, num_cols, seed, generator)
+        return await asyncio.shield(
+            self.__coalesce(key, lambda: asyncio.ensure_future(build()))
+        )
+
+    async def solve(self, fingerprint, algorithm="bfs", start=None, end=None):
+        entry = self.__maze(fingerprint)
+        if algorithm not in ALGORITHMS:
+            raise HttpError(400, f"unknown algorithm {algorithm!r}")
+        num_cols, num_rows = entry["cols"], entry["rows"]
+        start = _point([0, 0] if start is None else start, num_cols, num_rows)
+        end = _point(
+            [num_cols - 1, num_rows - 1] if end is None else end, num_cols, num_rows
+        )
+        key = (fingerprint, start, end, algorithm)
+        result = self.__cache.get(key)
+        if result is not None:
+            return result
+
+        def enqueue():
+            future = asyncio.get_running_loop().create_future()
+            batch_key = (fingerprint, algorithm)
+            batch = self.__batches.get(batch_key)
+            if batch is None:
+                batch = self.__batches[batch_key] = []
+                asyncio.get_running_loop().call_later(
+                    self.batch_window, self.__flush, batch_key
+                )
+            batch.append((start, end, future))
+            return future
+
+        return await asyncio.shield(self.__coalesce(key, enqueue))
+
+    def __flush(self, batch_key):
+        batch = self.__batches.pop(batch_key)
+        asyncio.ensure_future(self.__search(batch_key, batch))
+
+    async def __search(self, batch_key, batch):
+        fingerprint, algorithm = batch_key
+        pairs = [(start, end) for start, end, _ in batch]
+        futures = {(start, end): future for start, end, future in batch}
+        self.counters["batches"] += 1
+        if algorithm == "bfs":
+            self.counters["searches"] += len({start for start, _ in pairs})
+        elif algorithm != "lca":
+            self.counters["searches"] += len(pairs)
+        try:
+            results = await self.__run(_solve_task, fingerprint, algorithm, pairs)
+            if results == MISSING:
+                entry = self.__mazes.get(fingerprint)
+                if entry is None:
+                    raise HttpError(404, f"maze {fingerprint!r} was evicted")
+                packed = (entry["cols"], entry["rows"], entry["seed"], entry["cells"])
+                results = await self.__run(
+                    _solve_task, fingerprint, algorithm, pairs, packed
+                )
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for start, end, path, expanded in results:
+            result = SolveResult(algorithm, path, expanded)
+            self.__cache.put((fingerprint, start, end, algorithm), result)
+            futures[(start, end)].set_result(result)
+
+    def stats(self):
+        return dict(
+            self.counters,
+            mazes=len(self.__mazes),
+            cache_hits=self.__cache.hits,
+            cache_misses=self.__cache.misses,
+        )
+
+    async def __dispatch(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == "/stats":
+            return self.stats()
+        if url.path == "/path":
+            if method != "GET":
+                raise HttpError(405, "use GET for /path")
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            params = {
+                "id": query.get("id"),
+                "algorithm": "lca",
+                "start": _query_point(query["start"]) if "start" in query else None,
+                "end": _query_point(query["end"]) if "end" in query else None,
+            }
+        else:
+            if method != "POST":
+                raise HttpError(405, f"use POST for {url.path}")
+            try:
+                params = json.loads(body or b"{}")
+            except ValueError:
+                raise HttpError(400, "body is not valid JSON")
+            if not isinstance(params, dict):
+                raise HttpError(400, "body must be a JSON object")
+
+        if url.path == "/generate":
+            try:
+                entry = await self.generate(
+                    int(params.get("rows", 20)),
+                    int(params.get("cols", 20)),
+                    params.get("seed"),
+                    params.get("generator", "backtracker"),
+                )
+            except (TypeError, ValueError) as e:
+                raise HttpError(400, str(e))
+            return {name: value for name, value in entry.items() if name != "cells"}
+        if url.path in ("/solve", "/path"):
+            algorithm = params.get("algorithm", "bfs")
+            result = await self.solve(
+                params.get("id"), algorithm, params.get("start"), params.get("end")
+            )
+            return {
+                "id": params.get("id"),
+                "algorithm": algorithm,
+                "length": result.length,
+                "expanded": result.expanded,
+                "cached": result.cached,
+                "path": result.path,
+            }
+        raise HttpError(404, f"no route for {url.path}")
+
+    async def __respond(self, writer, method, target, body, keep_alive):
+        self.counters["requests"] += 1
+        try:
+            payload = await self.__dispatch(method, target, body)
+            status = 200
+        except HttpError as e:
+            payload, status = {"error": str(e)}, e.status
+        except Exception as e:
+            payload, status = {"error": f"{type(e).__name__}: {e}"}, 500
+
+        headers = [
+            ("Content-Type", "application/json"),
+            ("Connection", "keep-alive" if keep_alive else "close"),
+        ]
+        path = payload.get("path")
+        if path is None or len(path) <= self.stream_threshold:
+            data = json.dumps(payload).encode()
+            headers.append(("Content-Length", len(data)))
+            writer.write(_head(status, headers) + data)
+            await writer.drain()
+            return
+
+        # Large paths go out as chunked JSON so the response is never built
+        # as one string; each chunk is a slice of the coordinate list.
+        headers.append(("Transfer-Encoding", "chunked"))
+        head = {name: value for name, value in payload.items() if name != "path"}
+        prefix = json.dumps(head)[:-1] + (', "path": [' if head else '"path": [')
+        writer.write(_head(status, headers) + _chunk(prefix.encode()))
+        for k in range(0, len(path), CHUNK_POINTS):
+            data = json.dumps(path[k : k + CHUNK_POINTS])[1:-1]
+            writer.write(_chunk((b"," if k else b"") + data.encode()))
+            await writer.drain()
+        writer.write(_chunk(b"]}") + b"0\r\n\r\n")
+        await writer.drain()
+
+    async def __handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # Without a usable length the body cannot be skipped, so
+                    # answer and drop the connection.
+                    data = json.dumps({"error": "bad Content-Length"}).encode()
+                    writer.write(
+                        _head(
+                            400,
+                            [
+                                ("Content-Type", "application/json"),
+                                ("Content-Length", len(data)),
+                                ("Connection", "close"),
+                            ],
+                        )
+                        + data
+                    )
+                    break
+                if length > MAX_BODY:
+                    writer.write(
+                        _head(413, [("Content-Length", 0), ("Connection", "close")])
+                    )
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                await self.__respond(writer, method, target, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, **kwargs):
+    server = MazeServer(**kwargs)
+    listener = await server.start(host, port)
+    print(f"Serving mazes on http://{host}:{listener.sockets[0].getsockname()[1]}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve maze generation and solving.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="process pool size, 0 for threads"
+    )
+    parser.add_argument("--max-mazes", type=int, default=16)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                max_mazes=args.max_mazes,
+                workers=args.workers,
+                batch_window=args.batch_window_ms / 1000,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
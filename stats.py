@@ -0,0 +1,93 @@
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+
+class MazeStats:
+    def __init__(self):
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+        self.profile = None
+
+    def reset(self):
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+        self.profile = None
+
+    @contextmanager
+    def phase(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def add_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def capture(self, func, *args, mode="cprofile", limit=25, **kwargs):
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            result = profiler.runcall(func, *args, **kwargs)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(
+                limit
+            )
+            self.profile = out.getvalue()
+            return result
+        if mode == "setprofile":
+            calls = {}
+
+            def tracer(frame, event, arg):
+                if event == "call":
+                    code = frame.f_code
+                    key = f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+                    calls[key] = calls.get(key, 0) + 1
+
+            previous = sys.getprofile()
+            sys.setprofile(tracer)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                sys.setprofile(previous)
+            self.profile = dict(sorted(calls.items(), key=lambda item: -item[1]))
+            return result
+        raise ValueError(f"Unknown profile mode: {mode}")
+
+    def as_dict(self):
+        return {
+            "phases": {
+                name: {"seconds": seconds, "calls": self.calls[name]}
+                for name, seconds in self.timings.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_prometheus(self, prefix="maze"):
+        lines = [
+            f"# HELP {prefix}_phase_seconds_total Time spent in each Maze phase.",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        for name, seconds in self.timings.items():
+            lines.append(f'{prefix}_phase_seconds_total{{phase="{name}"}} {seconds!r}')
+        lines.append(f"# HELP {prefix}_phase_calls_total Calls of each Maze phase.")
+        lines.append(f"# TYPE {prefix}_phase_calls_total counter")
+        for name, calls in self.calls.items():
+            lines.append(f'{prefix}_phase_calls_total{{phase="{name}"}} {calls}')
+        for name, value in self.counters.items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+import queue
+import threading
+import time
+
+FRAME_BUDGET_MS = 8
+POLL_MS = 16
+
+
+class BackgroundTask:
+    def __init__(
+        self,
+        win,
+        work,
+        on_done=None,
+        on_progress=None,
+        on_cancel=None,
+        on_error=None,
+        after=None,
+        frame_budget_ms=FRAME_BUDGET_MS,
+        poll_ms=POLL_MS,
+    ):
+        self.__win = win
+        self.__work = work
+        self.__on_done = on_done
+        self.__on_progress = on_progress
+        self.__on_cancel = on_cancel
+        self.__on_error = on_error
+        self.__after = after
+        self.__budget = frame_budget_ms / 1000
+        self.__poll_ms = poll_ms
+        self.__queue = queue.SimpleQueue()
+        self.__job = None
+        self.__finished = False
+        self.cancelled = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+    @property
+    def running(self):
+        return not self.__finished
+
+    def start(self):
+        self.__thread.start()
+        self.__job = self.__win.schedule(self.__poll_ms, self.__poll)
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def post(self, kind, payload=None):
+        self.__queue.put((kind, payload))
+
+    def join(self, timeout=None):
+        self.__thread.join(timeout)
+
+    def __run(self):
+        if self.__after is not None:
+            self.__after.join()
+            self.__after = None
+        try:
+            result = self.__work(self)
+        except Exception as e:
+            if self.cancelled.is_set():
+                self.post("cancelled")
+            else:
+                self.post("error", e)
+            return
+        self.post("cancelled" if self.cancelled.is_set() else "done", result)
+
+    def __poll(self):
+        self.__job = None
+        deadline = time.perf_counter() + self.__budget
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self.__queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if self.__on_progress is not None:
+                    self.__on_progress(payload)
+                continue
+            self.__finished = True
+            if kind == "done":
+                if self.__on_done is not None:
+                    self.__on_done(payload)
+            elif kind == "cancelled":
+                if self.__on_cancel is not None:
+                    self.__on_cancel()
+            elif self.__on_error is not None:
+                self.__on_error(payload)
+            else:
+                raise payload
+            return
+        self.__job = self.__win.schedule(self.__poll_ms, self.__poll)
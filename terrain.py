@@ -0,0 +1,87 @@
+from array import array
+
+UNREACHED = 2**31 - 1
+MUD = 3
+WATER = 8
+
+
+def random_terrain(num_cols, num_rows, rng, costs=(MUD, WATER), patches=None):
+    weights = bytearray([1]) * (num_cols * num_rows)
+    if patches is None:
+        patches = max(1, num_cols * num_rows // 256)
+    for _ in range(patches):
+        width = rng.randint(1, min(num_cols, 16))
+        height = rng.randint(1, min(num_rows, 16))
+        x = rng.randrange(num_cols - width + 1)
+        y = rng.randrange(num_rows - height + 1)
+        fill = bytes([rng.choice(costs)]) * height
+        for i in range(x, x + width):
+            start = i * num_rows + y
+            weights[start : start + height] = fill
+    return weights
+
+
+def check_weights(weights, size):
+    if len(weights) != size:
+        raise ValueError(f"expected {size} weights, got {len(weights)}")
+    if size and min(weights) < 1:
+        raise ValueError("weights must be between 1 and 255")
+
+
+def dial_shortest_path(graph, weights, start, end, record=None):
+    offsets = graph.offsets
+    neighbors = graph.neighbors
+    dist = array("i", [UNREACHED]) * len(graph)
+    parent = array("i", [-1]) * len(graph)
+    dist[start] = 0
+    parent[start] = start
+    # Dial's queue: weights are small positive integers, so every queued
+    # distance lies within max(weights) of the current one and a ring of
+    # max(weights) + 1 buckets replaces the heap.
+    width = max(weights) + 1 if len(weights) else 2
+    buckets = [[] for _ in range(width)]
+    buckets[0].append(start)
+    d = 0
+    empty = 0
+    expanded = 0
+
+    while empty < width:
+        bucket = buckets[d % width]
+        if not bucket:
+            empty += 1
+            d += 1
+            continue
+        empty = 0
+        for idx in bucket:
+            if dist[idx] != d:
+                continue
+            expanded += 1
+            if record is not None and idx != start:
+                record(parent[idx], idx)
+            if idx == end:
+                return parent, expanded
+            for n_idx in neighbors[offsets[idx] : offsets[idx + 1]]:
+                n_dist = d + weights[n_idx]
+                if n_dist < dist[n_idx]:
+                    dist[n_idx] = n_dist
+                    parent[n_idx] = idx
+                    buckets[n_dist % width].append(n_idx)
+        bucket.clear()
+        d += 1
+    return None, expanded
+
+
+def shortest_path_scipy(graph, weights, start, end):
+    import numpy as np
+    from scipy.sparse import csgraph
+
+    dist, predecessors = csgraph.dijkstra(
+        graph.to_scipy(weights),
+        directed=True,
+        indices=start,
+        return_predecessors=True,
+    )
+    if np.isinf(dist[end]):
+        return None, int(np.count_nonzero(~np.isinf(dist)))
+    expanded = int(np.count_nonzero(dist <= dist[end]))
+    return array("i", predecessors.astype(np.int32).tobytes()), expanded
@@ -1,6 +1,42 @@
+from array import array
+import asyncio
+import json
+import os
+import random
+import struct
+import tempfile
+import threading
 import unittest
+import zlib
 
-from maze import Maze
+from batch import generate_batch
+from cache import SolveCache
+from cell import Cell
+from events import CARVE, PATH
+from generators import GENERATORS, eller_rows, open_ends
+from graph import build_graph, prune_dead_ends
+from grid import WallGrid, LEFT, RIGHT, TOP, BOTTOM
+from lca import LcaIndex
+from loadtest import HttpClient, run_load
+from maze import Maze, SolveCancelled
+from maze_bench import compare_results, corridor_grid, heapq_dijkstra, run_benchmarks
+from raster import rasterize, write_png, write_png_rows, WALL, BACKGROUND
+from player import EventPlayer
+from render import PATH_TAG, wall_polylines, wall_segments
+from server import MazeServer
+from stats import MazeStats
+from tasks import BackgroundTask
+from terrain import random_terrain
+from tiles import TiledGrid
+from mazefile import (
+    MazeFileError,
+    read_header,
+    save_grid,
+    to_ascii,
+    from_ascii,
+    write_rows,
+    iter_rows,
+)
 
 
 class Tests(unittest.TestCase):
@@ -41,6 +77,740 @@ class Tests(unittest.TestCase):
                     False,
                 )
 
+    def test_maze_wall_grid_storage(self):
+        num_cols = 12
+        num_rows = 10
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=1)
+        grid = m1.grid
+        self.assertEqual(len(grid.cells), num_cols * num_rows)
+        for i in range(num_cols):
+            for j in range(num_rows):
+                cell = m1._Maze__cells[i][j]
+                self.assertEqual(cell.has_right_wall, grid.has_wall(i, j, RIGHT))
+                if i < num_cols - 1:
+                    self.assertEqual(
+                        cell.has_right_wall,
+                        m1._Maze__cells[i + 1][j].has_left_wall,
+                    )
+
+    def test_maze_storage_dimensions_mismatch(self):
+        with self.assertRaises(ValueError):
+            Maze(0, 0, 10, 12, 10, 10, storage=WallGrid(5, 5))
+
+    def test_cell_view_writes_through(self):
+        grid = WallGrid(3, 3)
+        cell = Cell(grid=grid, i=1, j=2)
+        cell.has_left_wall = False
+        self.assertFalse(grid.has_wall(1, 2, LEFT))
+        self.assertTrue(Cell().has_top_wall)
+
+    def test_maze_seed_does_not_touch_global_random(self):
+        random.seed(42)
+        expected = random.random()
+        random.seed(42)
+        Maze(0, 0, 10, 12, 10, 10, seed=7)
+        self.assertEqual(random.random(), expected)
+
+    def test_batch_generation_is_reproducible(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            results = list(generate_batch(8, 6, 3, out_dir, seed_start=5, workers=2))
+            self.assertEqual([r["seed"] for r in results], [5, 6, 7])
+            for result in results:
+                loaded = Maze.load(result["path"])
+                expected = Maze(0, 0, 8, 6, 10, 10, seed=result["seed"])
+                self.assertEqual(loaded.fingerprint, expected.fingerprint)
+
+    def test_maze_records_events(self):
+        num_cols = 12
+        num_rows = 10
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=3, record_events=True)
+        carves = [event for event in m1.events if event[0] == CARVE]
+        self.assertEqual(len(carves), num_cols * num_rows - 1 + 2)
+        self.assertTrue(m1.solve("bfs"))
+        path = [event for event in m1.events if event[0] == PATH]
+        self.assertEqual(path[0][1:3], (0, 0))
+        self.assertEqual(path[-1][3:], (num_cols - 1, num_rows - 1))
+
+    def test_maze_headless_records_nothing(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=3)
+        self.assertIsNone(m1.events)
+
+    def test_solvers_follow_long_corridor(self):
+        num_cols = 5
+        num_rows = 4
+        m1 = Maze(
+            0,
+            0,
+            num_rows,
+            num_cols,
+            10,
+            10,
+            storage=corridor_grid(num_cols, num_rows),
+            record_events=True,
+            generate=False,
+        )
+        for algorithm in ("dfs", "bfs"):
+            self.assertTrue(m1.solve(algorithm))
+            path = [event for event in m1.events if event[0] == PATH]
+            self.assertEqual(len(path), num_cols * num_rows - 1)
+
+    def test_astar_matches_bfs_path(self):
+        for seed in range(5):
+            m1 = Maze(0, 0, 15, 20, 10, 10, seed=seed, record_events=True)
+            paths = {}
+            expanded = {}
+            for algorithm in ("bfs", "astar"):
+                self.assertTrue(m1.solve(algorithm))
+                paths[algorithm] = [e for e in m1.events if e[0] == PATH]
+                expanded[algorithm] = m1.nodes_expanded
+            self.assertEqual(paths["astar"], paths["bfs"])
+            self.assertLessEqual(expanded["astar"], expanded["bfs"])
+
+    def test_bidirectional_solvers_match_bfs(self):
+        rng = random.Random(3)
+        m1 = Maze(0, 0, 12, 15, 10, 10, seed=3, generator="prim")
+        for _ in range(20):
+            i, j = rng.randrange(14), rng.randrange(12)
+            m1.grid.carve(i, j, i + 1, j)
+        graph = build_graph(m1.grid)
+        for _ in range(20):
+            start = (rng.randrange(15), rng.randrange(12))
+            end = (rng.randrange(15), rng.randrange(12))
+            expected = m1.solve("bfs", graph, start, end)
+            for algorithm in ("bibfs", "biastar"):
+                result = m1.solve(algorithm, graph, start, end)
+                self.assertEqual(result.length, expected.length)
+                self.assertEqual((result.path[0], result.path[-1]), (start, end))
+        m2 = Maze(0, 0, 60, 60, 10, 10, seed=1, generator="prim")
+        bfs = m2.solve("bfs")
+        self.assertLess(m2.solve("bibfs").expanded, bfs.expanded)
+        self.assertLess(m2.solve("biastar").expanded, m2.solve("astar").expanded)
+
+    def test_prune_dead_ends_leaves_corridor(self):
+        m1 = Maze(0, 0, 20, 25, 10, 10, seed=8)
+        pruned = m1.pruned_graph()
+        self.assertIs(m1.pruned_graph(), pruned)
+        path = m1.solve("bfs").path
+        self.assertEqual(pruned.num_edges(), len(path) - 1)
+        result = m1.solve("dfs", prune=True)
+        self.assertEqual(result.path, path)
+        self.assertEqual(result.expanded, len(path))
+
+        m2 = Maze(0, 0, 6, 6, 10, 10, seed=8)
+        m2.grid.carve(2, 2, 3, 2)
+        m2.grid.carve(2, 3, 3, 3)
+        graph = prune_dead_ends(build_graph(m2.grid), (0, 35))
+        for idx in range(1, 35):
+            self.assertNotEqual(graph.degree(idx), 1)
+        self.assertEqual(m2.solve("bfs", graph).length, m2.solve("bfs").length)
+
+    def test_lca_path_queries(self):
+        m1 = Maze(0, 0, 14, 11, 10, 10, seed=21, generator="wilson")
+        rng = random.Random(21)
+        for _ in range(30):
+            a = (rng.randrange(11), rng.randrange(14))
+            b = (rng.randrange(11), rng.randrange(14))
+            expected = m1.solve("bfs", start=a, end=b).path
+            self.assertEqual(m1.path(a, b), expected)
+            self.assertEqual(m1.path_length(a, b), len(expected) - 1)
+        for j in range(14):
+            m1.grid.carve(0, j, 1, j)
+        with self.assertRaises(ValueError):
+            LcaIndex(build_graph(m1.grid))
+
+    def test_solve_many_groups_by_source(self):
+        m1 = Maze(0, 0, 12, 10, 10, 10, seed=17, generator="kruskal")
+        rng = random.Random(17)
+        sources = [(0, 0), (4, 7), (9, 11)]
+        pairs = [
+            (rng.choice(sources), (rng.randrange(10), rng.randrange(12)))
+            for _ in range(40)
+        ]
+        for workers in (1, 2):
+            results = list(m1.solve_many(pairs, workers=workers))
+            self.assertEqual(len(results), len(pairs))
+            for start, end, result in results:
+                self.assertEqual(result.path, m1.path(start, end))
+        lca_results = list(m1.solve_many(pairs, algorithm="lca"))
+        self.assertEqual([(start, end) for start, end, _ in lca_results], pairs)
+        with self.assertRaises(ValueError):
+            list(m1.solve_many(pairs, algorithm="dfs"))
+
+    def test_weighted_solvers_find_cheapest_path(self):
+        m1 = Maze(0, 0, 12, 12, 10, 10, seed=5, generator="prim")
+        for j in range(12):
+            m1.grid.carve(5, j, 6, j)
+        m1.set_weights(random_terrain(12, 12, random.Random(5), patches=12))
+        graph = build_graph(m1.grid)
+        parent, _ = heapq_dijkstra(graph, m1.weights, 0, len(graph) - 1)
+        expected = 0
+        idx = len(graph) - 1
+        while idx != 0:
+            expected += m1.weights[idx]
+            idx = parent[idx]
+        for algorithm in ("dijkstra", "astar", "biastar"):
+            path = m1.solve(algorithm, graph).path
+            cost = sum(m1.grid.weight(i, j) for i, j in path[1:])
+            self.assertEqual(cost, expected, algorithm)
+        with self.assertRaises(ValueError):
+            m1.set_weights(bytes(144))
+
+    def test_weights_round_trip_through_file(self):
+        m1 = Maze(0, 0, 6, 7, 10, 10, seed=2)
+        plain = m1.fingerprint
+        m1.set_weights(random_terrain(7, 6, random.Random(2)))
+        self.assertNotEqual(m1.fingerprint, plain)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "w.maze")
+            m1.save(path)
+            m2 = Maze.load(path)
+            self.assertEqual(bytes(m2.weights), bytes(m1.weights))
+            self.assertEqual(m2.fingerprint, m1.fingerprint)
+            del m2
+
+    def test_set_wall_updates_incremental_solve(self):
+        m1 = Maze(0, 0, 15, 15, 10, 10, seed=9, generator="kruskal")
+        rng = random.Random(9)
+        self.assertEqual(m1.solve("lpastar").path, m1.solve("bfs").path)
+        for _ in range(40):
+            i, j = rng.randrange(15), rng.randrange(15)
+            side = rng.choice((LEFT, RIGHT, TOP, BOTTOM))
+            m1.set_wall(i, j, side, rng.random() < 0.5)
+            self.assertEqual(m1.solve("lpastar").length, m1.solve("bfs").length)
+        m1.set_wall(7, 7, RIGHT, False)
+        self.assertFalse(m1.grid.has_wall(8, 7, LEFT))
+        cells = bytes(m1.grid.cells)
+        for args, error in (
+            ((3, 3, LEFT | TOP), ValueError),
+            ((3, 3, 16), ValueError),
+            ((15, 0, LEFT), IndexError),
+            ((0, 15, TOP), IndexError),
+            ((-1, 0, RIGHT), IndexError),
+            ((0, -1, BOTTOM), IndexError),
+        ):
+            with self.assertRaises(error, msg=args):
+                m1.set_wall(*args, True)
+        self.assertEqual(bytes(m1.grid.cells), cells)
+        m1.solve("lpastar")
+        self.assertLess(m1.cells_touched, 15 * 15)
+
+    def test_maze_graph_matches_walls(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=4)
+        graph = m1.graph
+        self.assertIs(m1.graph, graph)
+        self.assertEqual(graph.num_edges(), 10 * 12 - 1)
+        for idx in range(len(graph)):
+            for n_idx in graph.neighbors_of(idx):
+                self.assertIn(idx, graph.neighbors_of(n_idx))
+        m1.regenerate(seed=5)
+        self.assertIsNot(m1.graph, graph)
+
+    def test_maze_graph_to_scipy(self):
+        try:
+            import scipy  # noqa: F401
+        except ImportError:
+            self.skipTest("scipy is not installed")
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=4)
+        matrix = m1.graph.to_scipy()
+        self.assertEqual(matrix.shape, (120, 120))
+        self.assertEqual(matrix.nnz, 2 * (120 - 1))
+
+    def test_maze_distance_field(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=6, record_events=True)
+        dist = m1.distance_field((0, 0))
+        self.assertEqual(len(dist), 12)
+        self.assertEqual(len(dist[0]), 10)
+        self.assertEqual(dist[0][0], 0)
+        self.assertTrue(m1.solve("bfs"))
+        path = [event for event in m1.events if event[0] == PATH]
+        self.assertEqual(dist[11][9], len(path))
+        for i in range(12):
+            for j in range(10):
+                self.assertGreater(dist[i][j], -1)
+        self.assertIs(type(dist), list)
+        self.assertTrue(all(type(column) is array for column in dist))
+        self.assertTrue(all(column.typecode == "i" for column in dist))
+
+    def test_solve_returns_path(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=8)
+        result = m1.solve("bfs")
+        self.assertEqual(result.path[0], (0, 0))
+        self.assertEqual(result.path[-1], (11, 9))
+        self.assertEqual(result.length, len(result.path) - 1)
+        self.assertFalse(m1.solve("unknown"))
+
+    def test_solve_cache_hits_skip_search(self):
+        cache = SolveCache()
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=8, cache=cache)
+        first = m1.solve("astar")
+        second = m1.solve("astar")
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(first.path, second.path)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        m2 = Maze(0, 0, 10, 12, 10, 10, seed=8, cache=cache)
+        self.assertEqual(m2.fingerprint, m1.fingerprint)
+        self.assertTrue(m2.solve("astar").cached)
+        self.assertFalse(m2.solve("astar", prune=True).cached)
+        self.assertTrue(m2.solve("astar", prune=True).cached)
+        self.assertFalse(m2.solve("astar", graph=m2.graph).cached)
+        self.assertFalse(m2.solve("astar", graph=m2.graph).cached)
+
+    def test_solve_cache_eviction_and_persistence(self):
+        cache = SolveCache(max_entries=2)
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=8, cache=cache)
+        for algorithm in ("dfs", "bfs", "astar"):
+            m1.solve(algorithm)
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(m1.solve("dfs").cached)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "solves")
+            store = SolveCache(path=path)
+            m1 = Maze(0, 0, 10, 12, 10, 10, seed=8, cache=store)
+            expected = m1.solve("bfs").path
+            store.close()
+            store = SolveCache(path=path)
+            m1 = Maze(0, 0, 10, 12, 10, 10, seed=8, cache=store)
+            result = m1.solve("bfs")
+            store.clear()
+            self.assertFalse(m1.solve("dfs").cached)
+            store.close()
+            self.assertTrue(result.cached)
+            self.assertEqual(result.path, expected)
+            store = SolveCache(path=path)
+            m1 = Maze(0, 0, 10, 12, 10, 10, seed=8, cache=store)
+            self.assertFalse(m1.solve("bfs").cached)
+            self.assertTrue(m1.solve("dfs").cached)
+            store.close()
+
+    def test_maze_save_and_load(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=9)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "m.maze")
+            m1.save(path)
+            header = read_header(path)
+            self.assertEqual((header["num_cols"], header["num_rows"]), (12, 10))
+            self.assertEqual(header["seed"], 9)
+            self.assertEqual(header["generator"], "backtracker")
+            m2 = Maze.load(path)
+            self.assertEqual(m2.fingerprint, m1.fingerprint)
+            self.assertEqual(m2.solve("bfs").path, m1.solve("bfs").path)
+            self.assertEqual((m2.entrance, m2.exit), ((0, 0), (11, 9)))
+            del m2
+
+            save_grid(path, m1.grid, 9, entrance=(3, 2), exit=(5, 7))
+            m3 = Maze.load(path)
+            self.assertEqual((m3.entrance, m3.exit), ((3, 2), (5, 7)))
+            self.assertEqual(
+                m3.solve("bfs").path, m1.solve("bfs", start=(3, 2), end=(5, 7)).path
+            )
+            m3.save(path)
+            header = read_header(path)
+            self.assertEqual((header["entrance"], header["exit"]), ((3, 2), (5, 7)))
+            m3.set_wall(0, 0, RIGHT, False)
+            m3.save(path)
+            m4 = Maze.load(path)
+            self.assertEqual(bytes(m4.grid.cells), bytes(m3.grid.cells))
+            self.assertEqual(sorted(os.listdir(tmp)), ["m.maze"])
+            del m3, m4
+
+    def test_maze_rejects_unstorable_seeds(self):
+        for seed in (2**70, -(2**63) - 1, "abc", b"abc"):
+            with self.assertRaises(ValueError):
+                Maze(0, 0, 3, 3, 10, 10, seed=seed)
+        m1 = Maze(0, 0, 3, 3, 10, 10, seed=2**63 - 1)
+        with self.assertRaises(ValueError):
+            m1.regenerate(seed="abc")
+        self.assertEqual(m1.seed, 2**63 - 1)
+
+    def test_maze_file_rejects_garbage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bad.maze")
+            with open(path, "wb") as f:
+                f.write(b"not a maze" * 10)
+            with self.assertRaises(MazeFileError):
+                Maze.load(path)
+
+    def test_ascii_round_trip(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=9)
+        grid = from_ascii(to_ascii(m1.grid))
+        self.assertEqual(bytes(grid.cells), bytes(m1.grid.cells))
+
+    def test_wall_polylines_cover_every_wall_once(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=10)
+        expected = set()
+        for p1, neighbors in wall_segments(m1.grid).items():
+            for p2 in neighbors:
+                expected.add(tuple(sorted((p1, p2))))
+        drawn = set()
+        drawn_length = 0
+        polylines = wall_polylines(m1.grid)
+        for polyline in polylines:
+            for (x1, y1), (x2, y2) in zip(polyline, polyline[1:]):
+                self.assertTrue(x1 == x2 or y1 == y2)
+                drawn_length += abs(x2 - x1) + abs(y2 - y1)
+                for x in range(min(x1, x2), max(x1, x2)):
+                    drawn.add(((x, y1), (x + 1, y1)))
+                for y in range(min(y1, y2), max(y1, y2)):
+                    drawn.add(((x1, y), (x1, y + 1)))
+        self.assertEqual(drawn, expected)
+        self.assertEqual(drawn_length, len(expected))
+
+    def test_raster_png_round_trip(self):
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=11)
+        raster = rasterize(m1.grid, 4, m1.solve("bfs").path)
+        self.assertEqual((raster.width, raster.height), (12 * 4 + 1, 10 * 4 + 1))
+        self.assertEqual(raster.pixels[0], WALL)
+        self.assertEqual(raster.pixels[2], BACKGROUND)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "m.png")
+            write_png(path, raster, rows_per_chunk=7)
+            with open(path, "rb") as f:
+                data = f.read()
+        self.assertTrue(data.startswith(b"\x89PNG"))
+        pos = 8
+        compressed = b""
+        while pos < len(data):
+            (length,) = struct.unpack(">I", data[pos : pos + 4])
+            if data[pos + 4 : pos + 8] == b"IDAT":
+                compressed += data[pos + 8 : pos + 8 + length]
+            pos += length + 12
+        scanlines = zlib.decompress(compressed)
+        stride = raster.width + 1
+        pixels = b"".join(
+            scanlines[y * stride + 1 : (y + 1) * stride] for y in range(raster.height)
+        )
+        self.assertEqual(pixels, bytes(raster.pixels))
+
+    def test_generators_make_perfect_mazes(self):
+        for name in GENERATORS:
+            m1 = Maze(0, 0, 9, 13, 10, 10, seed=3, generator=name)
+            self.assertEqual(m1.generator, name)
+            self.assertEqual(m1.graph.num_edges(), 9 * 13 - 1, name)
+            distances = m1.distance_field()
+            self.assertTrue(all(d >= 0 for column in distances for d in column))
+            self.assertTrue(m1.solve("bfs"), name)
+
+    def test_unknown_generator(self):
+        with self.assertRaises(ValueError):
+            Maze(0, 0, 5, 5, 10, 10, seed=1, generator="nope")
+        m1 = Maze(0, 0, 5, 5, 10, 10, seed=1)
+        with self.assertRaises(ValueError):
+            m1.regenerate(1, 5, 5, 10, 10, generator="nope")
+
+    def test_eller_stream_matches_maze(self):
+        stream = eller_rows(13, random.Random(4))
+        self.assertEqual(len([next(stream) for _ in range(500)]), 500)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "s.maze")
+            rows = open_ends(eller_rows(13, random.Random(4), 9))
+            self.assertEqual(write_rows(path, 13, rows, 4), 9)
+            self.assertEqual(read_header(path)["num_rows"], 9)
+            loaded = Maze.load(path)
+            expected = Maze(0, 0, 9, 13, 10, 10, seed=4, generator="eller")
+            self.assertEqual(loaded.fingerprint, expected.fingerprint)
+
+            png_path = os.path.join(tmp, "s.png")
+            write_png_rows(png_path, 13, iter_rows(path), 5)
+            raster_path = os.path.join(tmp, "r.png")
+            write_png(raster_path, rasterize(expected.grid, 5), rows_per_chunk=1000)
+            with open(png_path, "rb") as f1, open(raster_path, "rb") as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+    def test_benchmark_sweep_and_compare(self):
+        results = run_benchmarks(
+            [8], ("backtracker",), ("bfs", "astar"), ("headless",), memory=True
+        )
+        self.assertEqual(
+            [record["kind"] for record in results],
+            ["generate", "solve", "solve", "render"],
+        )
+        self.assertTrue(all(record["peak_bytes"] > 0 for record in results))
+        self.assertEqual(compare_results(results, results), [])
+        slower = [dict(record, seconds=record["seconds"] + 1) for record in results]
+        slower[1]["expanded"] += 1
+        metrics = [metric for _, metric, _ in compare_results(results, slower)]
+        self.assertEqual(metrics.count("seconds"), len(results))
+        self.assertIn("expanded", metrics)
+
+        results = run_benchmarks([12], ("kruskal",), renderers=(), memory=False)
+        lengths = {r["algorithm"]: r["length"] for r in results if r["kind"] == "solve"}
+        self.assertIn("hpastar", lengths)
+        self.assertEqual(lengths["hpastar"], lengths["bfs"])
+
+    def test_maze_stats_phases_and_export(self):
+        stats = MazeStats()
+        m1 = Maze(0, 0, 12, 12, 10, 10, seed=5, stats=stats)
+        self.assertIs(m1.stats, stats)
+        self.assertEqual(set(stats.timings), {"allocate", "carve", "reset_visited"})
+        result = m1.solve("astar")
+        self.assertEqual(stats.calls["solve"], 1)
+        self.assertEqual(stats.counters["expansions"], result.expanded)
+        self.assertGreaterEqual(stats.counters["heap_pushes"], result.expanded)
+        exported = json.loads(stats.to_json())
+        self.assertEqual(exported["counters"], stats.counters)
+        text = stats.to_prometheus()
+        self.assertIn('maze_phase_seconds_total{phase="carve"}', text)
+        self.assertIn(f"maze_expansions_total {result.expanded}", text)
+        self.assertEqual(stats.capture(m1.solve, "bfs").path, result.path)
+        self.assertIn("_solve_bfs", stats.profile)
+        stats.capture(m1.solve, "bfs", mode="setprofile")
+        self.assertTrue(any("_solve_bfs" in key for key in stats.profile))
+        stats.reset()
+        self.assertEqual(stats.as_dict(), {"phases": {}, "counters": {}})
+
+    def test_player_records_draw_stats(self):
+        class FakeWindow:
+            def __init__(self):
+                self.items = 0
+                self.polylines = 0
+                self.clears = 0
+                self.deleted = []
+                self.jobs = []
+
+            def schedule(self, delay_ms, callback):
+                self.jobs.append(callback)
+                return callback
+
+            def cancel(self, job):
+                self.jobs.remove(job)
+
+            def draw_line(self, line, fill_color=None, tag=None):
+                self.items += 1
+
+            def draw_polyline(self, points, fill_color=None, tag=None):
+                self.items += 1
+                self.polylines += 1
+
+            def clear_canvas(self):
+                self.clears += 1
+
+            def delete_tag(self, tag):
+                self.deleted.append(tag)
+
+        win = FakeWindow()
+        stats = MazeStats()
+        m1 = Maze(0, 0, 8, 9, 10, 10, win, seed=5, stats=stats)
+        player = EventPlayer(win, m1, m1.events, steps_per_frame=50)
+        player.play(from_blank=True)
+        while win.jobs:
+            win.jobs.pop(0)()
+        self.assertFalse(player.playing)
+        self.assertGreater(stats.calls["draw"], 2)
+        self.assertEqual(stats.counters["canvas_items"], win.items)
+        m1.solve("bfs")
+        m1.draw()
+        self.assertEqual(stats.counters["canvas_items"], win.items)
+
+        # Replaying a solve only swaps the path layer; the walls stay drawn.
+        polylines, win.clears, win.deleted = win.polylines, 0, []
+        player = EventPlayer(win, m1, m1.events, steps_per_frame=50)
+        player.play()
+        while win.jobs:
+            win.jobs.pop(0)()
+        self.assertEqual((win.clears, win.polylines), (0, polylines))
+        self.assertEqual(set(win.deleted), {PATH_TAG})
+
+        # Stopping a generation replay early still leaves the full wall layer.
+        m1.regenerate(seed=6)
+        player = EventPlayer(win, m1, m1.events, steps_per_frame=1)
+        player.play(from_blank=True)
+        win.jobs.pop(0)()
+        polylines = win.polylines
+        player.stop()
+        self.assertFalse(win.jobs)
+        self.assertGreater(win.polylines, polylines)
+
+    def test_solve_cancel(self):
+        m1 = Maze(0, 0, 20, 20, 10, 10, seed=2)
+        cancel = threading.Event()
+        self.assertTrue(m1.solve("bfs", cancel=cancel))
+        cancel.set()
+        for algorithm in ("dfs", "bfs", "astar", "bibfs", "biastar", "dijkstra"):
+            with self.assertRaises(SolveCancelled, msg=algorithm):
+                m1.solve(algorithm, cancel=cancel)
+        self.assertTrue(m1.solve("bfs"))
+
+    def test_background_task_drains_queue(self):
+        class FakeWindow:
+            def __init__(self):
+                self.jobs = []
+
+            def schedule(self, delay_ms, callback):
+                self.jobs.append(callback)
+                return callback
+
+        def run_until_idle(win):
+            while win.jobs:
+                win.jobs.pop(0)()
+
+        m1 = Maze(0, 0, 20, 20, 10, 10, seed=2)
+        seen = []
+
+        def work(task):
+            task.post("progress", "solving")
+            return m1.solve("astar", cancel=task.cancelled)
+
+        win = FakeWindow()
+        task = BackgroundTask(win, work, seen.append, seen.append).start()
+        run_until_idle(win)
+        self.assertFalse(task.running)
+        self.assertEqual(seen[0], "solving")
+        self.assertEqual(seen[1].path, m1.solve("bfs").path)
+
+        gate = threading.Event()
+
+        def blocked(task):
+            gate.wait()
+            return m1.solve("bfs", cancel=task.cancelled)
+
+        task = BackgroundTask(win, blocked, seen.append, None, lambda: seen.append("x"))
+        task.start()
+        task.cancel()
+        gate.set()
+        run_until_idle(win)
+        self.assertEqual(seen[-1], "x")
+
+        def broken(task):
+            raise RuntimeError("boom")
+
+        errors = []
+        task = BackgroundTask(win, broken, seen.append, on_error=errors.append)
+        task.start()
+        task.join()
+        run_until_idle(win)
+        self.assertFalse(task.running)
+        self.assertEqual([str(e) for e in errors], ["boom"])
+        task = BackgroundTask(win, broken).start()
+        task.join()
+        with self.assertRaises(RuntimeError):
+            run_until_idle(win)
+
+    def test_server_coalesces_and_streams(self):
+        async def scenario():
+            server = MazeServer(workers=0, stream_threshold=10)
+            listener = await server.start("127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            client = HttpClient("127.0.0.1", port)
+            try:
+                status, maze = await client.request(
+                    "POST", "/generate", {"rows": 15, "cols": 15, "seed": 8}
+                )
+                self.assertEqual(status, 200)
+                clients = [HttpClient("127.0.0.1", port) for _ in range(4)]
+                replies = await asyncio.gather(
+                    *(
+                        c.request("POST", "/solve", {"id": maze["id"], "end": end})
+                        for c, end in zip(clients, ([14, 14], [14, 14], [3, 9], None))
+                    )
+                )
+                for c in clients:
+                    await c.close()
+                path_reply = await client.request(
+                    "GET", f"/path?id={maze['id']}&start=0,0&end=3,9"
+                )
+                bad_cells = ["12", [1.5, 0], [True, 0], [0, 0, 0], {"0": 0}]
+                rejected = [
+                    (
+                        await client.request(
+                            "POST", "/solve", {"id": maze["id"], "start": cell}
+                        )
+                    )[0]
+                    for cell in bad_cells
+                ]
+                rejected.append(
+                    (await client.request("GET", f"/path?id={maze['id']}&start=a,b"))[0]
+                )
+                for bad_id in ([1], None, 7):
+                    status, _ = await client.request("POST", "/solve", {"id": bad_id})
+                    rejected.append(status)
+                for length in (b"abc", b"-5"):
+                    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                    writer.write(
+                        b"POST /solve HTTP/1.1\r\nContent-Length: "
+                        + length
+                        + b"\r\n\r\n"
+                    )
+                    status_line = await reader.readline()
+                    rejected.append(int(status_line.split()[1]))
+                    writer.close()
+                _, stats = await client.request("GET", "/stats")
+                report = await run_load(
+                    "127.0.0.1", port, 20, 4, 15, 15, seed=8, pairs=3
+                )
+                return maze, replies, path_reply, report, stats, rejected
+            finally:
+                await client.close()
+                listener.close()
+                await listener.wait_closed()
+                server.close()
+
+        maze, replies, path_reply, report, stats, rejected = asyncio.run(scenario())
+        self.assertEqual(rejected, [400] * 11)
+        expected = Maze(0, 0, 15, 15, 10, 10, seed=8)
+        self.assertEqual(maze["id"], expected.fingerprint)
+        full = [list(cell) for cell in expected.solve("bfs").path]
+        self.assertEqual([status for status, _ in replies], [200] * 4)
+        self.assertEqual(replies[0][1]["path"], full)
+        self.assertEqual(replies[3][1]["path"], full)
+        partial = [list(cell) for cell in expected.solve("bfs", end=(3, 9)).path]
+        self.assertEqual(replies[2][1]["path"], partial)
+        lca_reply = dict(replies[2][1], algorithm="lca", expanded=0)
+        self.assertEqual(path_reply, (200, lca_reply))
+        self.assertEqual(stats["coalesced"], 2)
+        self.assertEqual((report["requests"], report["errors"]), (20, 0))
+
+    def test_tiled_storage_matches_in_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "m.tiles")
+            grid = TiledGrid(path, 23, 17, tile_size=8, max_bytes=8 * 8 * 2)
+            m1 = Maze(0, 0, 17, 23, 10, 10, seed=6, storage=grid, generator="kruskal")
+            expected = Maze(0, 0, 17, 23, 10, 10, seed=6, generator="kruskal")
+            self.assertEqual(m1.fingerprint, expected.fingerprint)
+            for algorithm in ("dfs", "astar", "lpastar"):
+                self.assertEqual(
+                    m1.solve(algorithm).path, expected.solve(algorithm).path
+                )
+            stats = grid.cache_stats()
+            self.assertGreater(stats["misses"], stats["max_tiles"])
+            self.assertLessEqual(stats["resident_bytes"], 8 * 8 * 2)
+            grid.close()
+
+            with TiledGrid.open(path) as reopened:
+                self.assertEqual((reopened.num_cols, reopened.num_rows), (23, 17))
+                m2 = Maze(
+                    0, 0, 17, 23, 10, 10, seed=6, storage=reopened, generate=False
+                )
+                self.assertEqual(m2.fingerprint, expected.fingerprint)
+                m2.regenerate(seed=7, generator="kruskal")
+                expected.regenerate(seed=7, generator="kruskal")
+                self.assertIs(m2.grid, reopened)
+                self.assertEqual(m2.fingerprint, expected.fingerprint)
+                with self.assertRaises(ValueError):
+                    m2.regenerate(seed=8, num_rows=5)
+                self.assertEqual(m2.seed, 7)
+
+    def test_hpastar_matches_bfs_and_tracks_edits(self):
+        m1 = Maze(0, 0, 37, 45, 10, 10, seed=9, generator="kruskal")
+        m1.build_hpa_index(cluster_size=8)
+        rng = random.Random(9)
+        for step in range(60):
+            i, j = rng.randrange(1, 44), rng.randrange(1, 36)
+            m1.set_wall(i, j, rng.choice((LEFT, RIGHT, TOP, BOTTOM)), step % 4 == 0)
+            start = (rng.randrange(45), rng.randrange(37))
+            end = (rng.randrange(45), rng.randrange(37))
+            expected = m1.solve("bfs", start=start, end=end)
+            result = m1.solve("hpastar", start=start, end=end)
+            self.assertEqual(result.length, expected.length)
+            if result:
+                self.assertEqual((result.path[0], result.path[-1]), (start, end))
+
+        m2 = Maze(0, 0, 150, 150, 10, 10, seed=1, generator="kruskal")
+        astar = m2.solve("astar")
+        result = m2.solve("hpastar")
+        self.assertEqual(result.length, astar.length)
+        self.assertLess(result.expanded * 3, astar.expanded)
+
 
 if __name__ == "__main__":
     unittest.main()
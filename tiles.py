@@ -0,0 +1,215 @@
+import os
+import struct
+from collections import OrderedDict
+
+from grid import WallGrid, ALL_WALLS, CLEAR_VISITED
+
+MAGIC = b"MZTL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+TILE_SIZE = 256
+MAX_BYTES = 64 * 1024 * 1024
+
+# Tiles are stored with the wall bits flipped, so an all-zero tile (a hole
+# in a sparse file) reads back as a fresh tile with every wall standing.
+_FLIP = bytes(b ^ ALL_WALLS for b in range(256))
+
+
+class TileFileError(ValueError):
+    pass
+
+
+class TiledCells:
+    def __init__(
+        self,
+        path,
+        num_cols,
+        num_rows,
+        tile_size=TILE_SIZE,
+        max_bytes=MAX_BYTES,
+        create=True,
+    ):
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.tile_size = tile_size
+        self.tiles_down = -(-num_rows // tile_size)
+        self.tiles_across = -(-num_cols // tile_size)
+        self.max_tiles = max(1, max_bytes // (tile_size * tile_size))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        num_tiles = self.tiles_across * self.tiles_down
+        self.__size = num_cols * num_rows
+        self.__data_start = HEADER.size + num_tiles
+        self.__tiles = OrderedDict()
+        self.__dirty = set()
+        self.__last_key = -1
+        self.__last_tile = None
+        if create:
+            self.__fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            self.__present = bytearray(num_tiles)
+            header = HEADER.pack(MAGIC, VERSION, tile_size, num_cols, num_rows)
+            os.pwrite(self.__fd, header + self.__present, 0)
+            os.ftruncate(
+                self.__fd, self.__data_start + num_tiles * tile_size * tile_size
+            )
+        else:
+            self.__fd = os.open(path, os.O_RDWR)
+            self.__present = bytearray(os.pread(self.__fd, num_tiles, HEADER.size))
+
+    @classmethod
+    def open(cls, path, max_bytes=MAX_BYTES):
+        with open(path, "rb") as f:
+            data = f.read(HEADER.size)
+        if len(data) < HEADER.size:
+            raise TileFileError("file too short for a tile header")
+        magic, version, tile_size, num_cols, num_rows = HEADER.unpack(data)
+        if magic != MAGIC:
+            raise TileFileError("not a tiled maze file")
+        if version != VERSION:
+            raise TileFileError(f"unsupported tiled maze version {version}")
+        return cls(path, num_cols, num_rows, tile_size, max_bytes, create=False)
+
+    def __len__(self):
+        return self.__size
+
+    @property
+    def resident_bytes(self):
+        return len(self.__tiles) * self.tile_size * self.tile_size
+
+    def __tile(self, key):
+        tiles = self.__tiles
+        tile = tiles.get(key)
+        if tile is not None:
+            self.hits += 1
+            tiles.move_to_end(key)
+        else:
+            self.misses += 1
+            area = self.tile_size * self.tile_size
+            if self.__present[key]:
+                offset = self.__data_start + key * area
+                tile = bytearray(os.pread(self.__fd, area, offset).translate(_FLIP))
+            else:
+                tile = bytearray([ALL_WALLS]) * area
+            tiles[key] = tile
+            while len(tiles) > self.max_tiles:
+                old_key, old_tile = tiles.popitem(last=False)
+                self.evictions += 1
+                if old_key in self.__dirty:
+                    self.__write(old_key, old_tile)
+        self.__last_key = key
+        self.__last_tile = tile
+        return tile
+
+    def __write(self, key, tile):
+        area = self.tile_size * self.tile_size
+        os.pwrite(self.__fd, tile.translate(_FLIP), self.__data_start + key * area)
+        self.__dirty.discard(key)
+        if not self.__present[key]:
+            self.__present[key] = 1
+            os.pwrite(self.__fd, b"\1", HEADER.size + key)
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self.__size:
+            raise IndexError(idx)
+        size = self.tile_size
+        i, j = divmod(idx, self.num_rows)
+        key = i // size * self.tiles_down + j // size
+        tile = self.__last_tile if key == self.__last_key else self.__tile(key)
+        return tile[i % size * size + j % size]
+
+    def __setitem__(self, idx, value):
+        if not 0 <= idx < self.__size:
+            raise IndexError(idx)
+        size = self.tile_size
+        i, j = divmod(idx, self.num_rows)
+        key = i // size * self.tiles_down + j // size
+        tile = self.__last_tile if key == self.__last_key else self.__tile(key)
+        tile[i % size * size + j % size] = value
+        self.__dirty.add(key)
+
+    def __iter__(self):
+        for idx in range(self.__size):
+            yield self[idx]
+
+    def reset_visited(self):
+        for key in range(len(self.__present)):
+            if self.__present[key] or key in self.__tiles:
+                tile = self.__tile(key)
+                tile[:] = tile.translate(CLEAR_VISITED)
+                self.__dirty.add(key)
+
+    def clear(self):
+        # Forget every tile and punch the data area back into a hole, so the
+        # whole file reads as fresh tiles with every wall standing.
+        self.__tiles.clear()
+        self.__dirty.clear()
+        self.__last_key = -1
+        self.__last_tile = None
+        self.__present = bytearray(len(self.__present))
+        os.pwrite(self.__fd, self.__present, HEADER.size)
+        size = os.fstat(self.__fd).st_size
+        os.ftruncate(self.__fd, self.__data_start)
+        os.ftruncate(self.__fd, size)
+
+    def flush(self):
+        for key in list(self.__dirty):
+            self.__write(key, self.__tiles[key])
+
+    def close(self):
+        if self.__fd is not None:
+            self.flush()
+            os.close(self.__fd)
+            self.__fd = None
+            self.__tiles.clear()
+            self.__last_key = -1
+            self.__last_tile = None
+
+
+class TiledGrid(WallGrid):
+    def __init__(
+        self,
+        path,
+        num_cols,
+        num_rows,
+        tile_size=TILE_SIZE,
+        max_bytes=MAX_BYTES,
+        cells=None,
+    ):
+        if cells is None:
+            cells = TiledCells(path, num_cols, num_rows, tile_size, max_bytes)
+        super().__init__(num_cols, num_rows, cells)
+
+    @classmethod
+    def open(cls, path, max_bytes=MAX_BYTES):
+        cells = TiledCells.open(path, max_bytes)
+        return cls(path, cells.num_cols, cells.num_rows, cells=cells)
+
+    def reset_visited(self):
+        self.cells.reset_visited()
+
+    def clear(self):
+        self.cells.clear()
+        self.weights = None
+
+    def cache_stats(self):
+        cells = self.cells
+        return {
+            "hits": cells.hits,
+            "misses": cells.misses,
+            "evictions": cells.evictions,
+            "resident_bytes": cells.resident_bytes,
+            "max_tiles": cells.max_tiles,
+        }
+
+    def flush(self):
+        self.cells.flush()
+
+    def close(self):
+        self.cells.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()